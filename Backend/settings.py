@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -86,9 +87,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Applies to every transaction.atomic() block in the app: each one takes the
+        # database write lock when it begins (BEGIN IMMEDIATE), and waits up to 20s for
+        # it, instead of upgrading a read lock on its first write. Two read-then-write
+        # transactions then queue instead of deadlocking with "database is locked"
+        # (the image variant workers write alongside request threads). Read-only atomic
+        # blocks also serialize behind writers.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+        # File-backed so concurrency tests get one connection per thread with a busy
+        # timeout; kept in the temp directory rather than the source tree
+        'TEST': {'NAME': Path(tempfile.gettempdir()) / 'eswing_test_db.sqlite3'},
     }
 }
 
+# Live message streams (/api/messages/stream/). Use
+# 'sewing_app.streams.UnixSocketBackend' to share events between workers on one host.
+MESSAGE_STREAM_BACKEND = 'sewing_app.streams.LocalBackend'
+MESSAGE_STREAM_OPTIONS = {}
+
+# UserInteraction.last_interaction_time bumps are buffered per conversation and
+# flushed in batches every INTERACTION_FLUSH_INTERVAL seconds; a bump is never
+# written later than INTERACTION_MAX_STALENESS seconds after it was queued.
+INTERACTION_WRITE_BEHIND = True
+INTERACTION_FLUSH_INTERVAL = 1.0
+INTERACTION_MAX_STALENESS = 5.0
+INTERACTION_MAX_PENDING = 1000
+
+# Catalog responses (product listings and facets) are cached under version keys bumped
+# per owner/category on every product change. Use a shared backend (Redis, Memcached,
+# database) with several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+PRODUCT_FACETS_CACHE_TIMEOUT = 300
+PRODUCT_LIST_CACHE_TIMEOUT = 60
+
+# With PRODUCT_RATING_DEFERRED, add-rating only records the rating event and
+# `python manage.py fold_ratings` (run periodically) adds pending ratings to the
+# product counters in batches.
+PRODUCT_RATING_DEFERRED = False
+
+# Product and advertisement images are resized to these widths (WebP and JPEG) by
+# a pool of IMAGE_VARIANT_WORKERS threads after upload.
+IMAGE_VARIANT_WIDTHS = [320, 640, 1280]
+IMAGE_VARIANT_WORKERS = 2
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
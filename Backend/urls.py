@@ -15,6 +15,7 @@ from sewing_app.views import (
         delete_fabric_store, 
     delete_product,
     home_view,delete_atelier,delete_client,
+    message_stream,
 
 )
 from django.conf import settings
@@ -40,6 +41,8 @@ router.register(r'user-interactions', UserInteractionViewSet, basename='userinte
 urlpatterns = [
     path('', home_view, name='home'),
     path('admin/', admin.site.urls),
+    # Must come before the router so "stream" is not taken as a message id
+    path('api/messages/stream/', message_stream, name='message-stream'),
     # Routes ViewSets (gérées automatiquement)
     path('api/', include(router.urls)),
     path('api/ateliers/delete/<int:atelier_id>/', delete_atelier, name='delete_atelier'),
@@ -76,17 +79,19 @@ if settings.DEBUG:
 #   DELETE /api/clients/delete/<str:client_id>/
 
 # Ateliers:
-#   GET /api/ateliers/
+#   GET /api/ateliers/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
 #   POST /api/ateliers/
-#   GET /api/ateliers/{id}/
+#   GET /api/ateliers/{id}/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
 #   PUT /api/ateliers/{id}/
 #   DELETE /api/ateliers/{id}/
+#   GET /api/ateliers/suggested/?quantity=N&deadline=<ISO datetime>[&limit=10]  (ranked by free capacity before the deadline)
 #   POST /api/atelier/login/
 #   DELETE /api/ateliers/delete/<str:atelier_name>/
 
 
 # User Interactions:
 #   GET /api/user-interactions/
+#   GET /api/user-interactions/?since=<token>[&user_id=X&user_role=Y]
 #   POST /api/user-interactions/
 #   GET /api/user-interactions/{id}/
 #   PUT /api/user-interactions/{id}/
@@ -98,10 +103,15 @@ if settings.DEBUG:
 #   GET /api/messages/{id}/
 #   PUT /api/messages/{id}/
 #   DELETE /api/messages/{id}/
+#   GET /api/messages/?sender_id=X&sender_role=Y&receiver_id=Z&receiver_role=W&before=<id>|after=<id>
+#   GET /api/messages/?since=<token>[&user_id=X&user_role=Y]  (delta sync; empty token returns the current head)
+#   POST /api/messages/bulk/
+#   GET /api/messages/stream/?user_id=X&user_role=Y  (server-sent events, ASGI only)
 #   GET /api/messages/conversation/?user1_id=X&user1_role=Y&user2_id=Z&user2_role=W
 #   GET /api/messages/conversations/?user_id=X&user_role=Y
-#   POST /api/messages/mark-read/
-#   GET /api/messages/unread-count/?user_id=X&user_role=Y
+#   GET /api/messages/search/?q=text&user_id=X&user_role=Y[&peer_id=Z&peer_role=W]
+#   POST /api/messages/mark-read/  {user_id, user_role, peer_id, peer_role[, up_to]}
+#   GET /api/messages/unread-count/?user_id=X&user_role=Y[&peer_id=Z&peer_role=W]
 
 
 # Fabric Stores:
@@ -114,11 +124,16 @@ if settings.DEBUG:
 #   DELETE /api/fabric-stores/delete/<str:fabric_store_name>/
 
 # Commandes:
-#   GET /api/commandes/
+#   GET /api/commandes/?user=X&atelier=Y&status=S&deadline_after=<ISO>&deadline_before=<ISO>&sort=newest|deadline  (all optional)
+#   GET /api/commandes/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
 #   POST /api/commandes/
-#   GET /api/commandes/{id}/
+#   GET /api/commandes/{id}/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
 #   PUT /api/commandes/{id}/
 #   DELETE /api/commandes/{id}/
+#   GET /api/commandes/events/?since=<token>[&atelier=X|&client=Y]  (status transitions; empty token returns the current head)
+#   GET /api/commandes/stats/?atelier=X&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD  (per day and status, from the rollups)
+#   POST /api/commandes/{id}/assign/  (the earliest pending atelier request wins; 409 if already taken)
+#   POST /api/commandes/{id}/refuse/  {atelier_id}  (required; the assigned atelier reopens the order and drops its requests)
 
 # Demandes Ateliers:
 #   GET /api/demandes-ateliers/
@@ -142,9 +157,14 @@ if settings.DEBUG:
 #   DELETE /api/demandes-fabric-store/{id}/
 
 # Products:
-#   GET /api/products/
+#   GET /api/products/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
+#   GET /api/products/?q=<text>  (ranked full-text search over name, description and category)
+#   GET /api/products/facets/  (counts per category, promo and price bucket; accepts the list filters)
+#   GET /api/products/cache-stats/  (hit/miss counters of the listing and facets caches; staff only)
+#   POST /api/products/import/  (authenticated; multipart "file" as JSONL or CSV, optional "format")
+#   GET /api/products/export/?export_format=jsonl|csv  (authenticated; accepts the list filters)
 #   POST /api/products/
-#   GET /api/products/{id}/
+#   GET /api/products/{id}/  (ETag / Last-Modified; If-None-Match or If-Modified-Since answer 304 when unchanged)
 #   PUT /api/products/{id}/
 #   DELETE /api/products/{id}/
 #   POST /api/products/{id}/apply-promo/
@@ -168,10 +188,15 @@ if settings.DEBUG:
 #   GET /api/messages/{id}/
 #   PUT /api/messages/{id}/
 #   DELETE /api/messages/{id}/
+#   GET /api/messages/?sender_id=X&sender_role=Y&receiver_id=Z&receiver_role=W&before=<id>|after=<id>
+#   GET /api/messages/?since=<token>[&user_id=X&user_role=Y]  (delta sync; empty token returns the current head)
+#   POST /api/messages/bulk/
+#   GET /api/messages/stream/?user_id=X&user_role=Y  (server-sent events, ASGI only)
 #   GET /api/messages/conversation/?user1_id=X&user1_role=Y&user2_id=Z&user2_role=W
 #   GET /api/messages/conversations/?user_id=X&user_role=Y
-#   POST /api/messages/mark-read/
-#   GET /api/messages/unread-count/?user_id=X&user_role=Y
+#   GET /api/messages/search/?q=text&user_id=X&user_role=Y[&peer_id=Z&peer_role=W]
+#   POST /api/messages/mark-read/  {user_id, user_role, peer_id, peer_role[, up_to]}
+#   GET /api/messages/unread-count/?user_id=X&user_role=Y[&peer_id=Z&peer_role=W]
 
 # Conversations:
 #   GET /api/conversations/
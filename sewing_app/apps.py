@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class SewingAppConfig(AppConfig):
+    name = 'sewing_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+CATALOG_VERSION_KEY = "products:version"
+CACHE_HITS_KEY = "products:cache:hits"
+CACHE_MISSES_KEY = "products:cache:misses"
+
+# (min, max) price ranges reported by the facets endpoint; max=None is open-ended
+PRICE_BUCKETS = [(0, 1000), (1000, 5000), (5000, 10000), (10000, 50000), (50000, None)]
+
+
+def _version_key(scope):
+    return CATALOG_VERSION_KEY if scope is None else f"{CATALOG_VERSION_KEY}:{scope[0]}:{scope[1]}"
+
+
+def _clock_version():
+    # Versions start from the clock so a lost key never reuses an old version number
+    return int(time.time() * 1000)
+
+
+def catalog_versions(scopes):
+    """Current version of each scope (None for the whole catalog, or ("owner"|"category", value))"""
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _clock_version(), None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump_catalog_versions(scopes):
+    """Invalidates every cached catalog response that depends on one of the scopes"""
+    for scope in [None, *scopes]:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _clock_version(), None)
+
+
+def _owner_value(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def product_scopes(product):
+    """Scopes a product belongs to, before and after its pending change"""
+    owners = {product.owner, getattr(product, "_loaded_scope", (None, None))[0]}
+    categories = {product.category, getattr(product, "_loaded_scope", (None, None))[1]}
+    return (
+        [("owner", _owner_value(owner)) for owner in owners if owner is not None] +
+        [("category", category) for category in categories if category is not None]
+    )
+
+
+def request_scopes(params):
+    """
+    Scopes a filtered catalog response depends on.
+
+    A response filtered by owner and/or category only changes when a product of
+    that owner or category changes; anything else depends on the whole catalog.
+    """
+    scopes = []
+    if params.get("owner"):
+        scopes.append(("owner", _owner_value(params["owner"])))
+    if params.get("category"):
+        scopes.append(("category", params["category"]))
+    return scopes or [None]
+
+
+def params_digest(params, ignore=()):
+    """Stable digest of the query parameters that shape a catalog response (order-insensitive)"""
+    items = sorted((key, value) for key, values in params.lists() if key not in ignore for value in values)
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def product_facets(queryset):
+    """
+    Counts a filtered product queryset per category, promo flag and price bucket.
+
+    Every count is a conditional aggregate over the same rows, so all facets come
+    from a single query.
+    """
+    categories = queryset.model.CATEGORY_CHOICES
+    aggregates = {"total": Count("pk")}
+    for value, _ in categories:
+        aggregates[f"category_{value}"] = Count("pk", filter=Q(category=value))
+    aggregates["promo_true"] = Count("pk", filter=Q(promo=True))
+    aggregates["promo_false"] = Count("pk", filter=Q(promo=False))
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        bucket = Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+        aggregates[f"price_{index}"] = Count("pk", filter=bucket)
+
+    counts = queryset.order_by().aggregate(**aggregates)
+    return {
+        "total": counts["total"],
+        "category": {value: counts[f"category_{value}"] for value, _ in categories},
+        "promo": {"true": counts["promo_true"], "false": counts["promo_false"]},
+        "price": [
+            {"min": low, "max": high, "count": counts[f"price_{index}"]}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def catalog_cache_key(kind, params, ignore=(), vary=""):
+    """Cache key for a catalog response; it changes whenever a scope the response depends on is bumped"""
+    versions = ".".join(str(version) for version in catalog_versions(request_scopes(params)))
+    return f"products:{kind}:{versions}:{params_digest(params, ignore)}{vary}"
+
+
+def record_cache_lookup(hit):
+    key = CACHE_HITS_KEY if hit else CACHE_MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_stats():
+    counts = cache.get_many([CACHE_HITS_KEY, CACHE_MISSES_KEY])
+    hits, misses = counts.get(CACHE_HITS_KEY, 0), counts.get(CACHE_MISSES_KEY, 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+def cached_product_facets(queryset, params):
+    key = catalog_cache_key("facets", params, ignore=("page", "page_size", "sort"))
+    facets = cache.get(key)
+    record_cache_lookup(facets is not None)
+    if facets is None:
+        facets = product_facets(queryset)
+        cache.set(key, facets, getattr(settings, "PRODUCT_FACETS_CACHE_TIMEOUT", 300))
+    return facets
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+
+# Maps a participant role to the model holding its display name
+PARTICIPANT_MODELS = {
+    "client": "Client",
+    "atelier": "Atelier",
+    "fabric_store": "FabricStore",
+}
+
+
+class ParticipantDirectory:
+    """
+    Process-local cache of participant names keyed by (role, user_id).
+
+    Entries are evicted least-recently-used once ``max_size`` is reached and
+    expire after ``ttl`` seconds, which bounds staleness for renames made by
+    other worker processes. Renames and deletions in this process invalidate
+    the entry immediately (see signals.py).
+    """
+
+    def __init__(self, max_size=4096, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(role, user_id):
+        try:
+            return (role, int(user_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_name(self, role, user_id):
+        """Returns the participant name, or None if it does not exist"""
+        key = self._key(role, user_id)
+        if key is None or role not in PARTICIPANT_MODELS:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                name, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return name
+                del self._entries[key]
+
+        model = apps.get_model("sewing_app", PARTICIPANT_MODELS[role])
+        name = model.objects.filter(user_id=key[1]).values_list("name", flat=True).first()
+
+        with self._lock:
+            self._entries[key] = (name, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return name
+
+    def invalidate(self, role, user_id):
+        key = self._key(role, user_id)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+participant_directory = ParticipantDirectory(
+    max_size=getattr(settings, "PARTICIPANT_DIRECTORY_MAX_SIZE", 4096),
+    ttl=getattr(settings, "PARTICIPANT_DIRECTORY_TTL", 300),
+)
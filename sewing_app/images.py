@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = sorted(getattr(settings, "IMAGE_VARIANT_WIDTHS", [320, 640, 1280]))
+
+# format key -> (Pillow format, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Manifest writes that fail (e.g. the database stays locked) are requeued with
+# exponential backoff starting at RETRY_DELAY seconds
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 1
+
+# Sent once an instance's image_variants manifest has been updated
+variants_ready = Signal()
+
+
+def storage_name(path):
+    """Maps an image reference (storage name or MEDIA_URL path) to a storage name; None for external URLs"""
+    if not path:
+        return None
+    if path.startswith(settings.MEDIA_URL):
+        return path[len(settings.MEDIA_URL):]
+    if "://" in path or path.startswith("/"):
+        return None
+    return path
+
+
+def variant_name(name, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f"variants/{root}_{width}w.{fmt}"
+
+
+def render_variants(name):
+    """
+    Writes every width/format variant of a stored image; returns {width: {format: storage name}}.
+
+    Widths at or above the original width are skipped (no upscaling).
+    """
+    with default_storage.open(name, "rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    variants = {}
+    for width in VARIANT_WIDTHS:
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        variants[str(width)] = {}
+        for fmt, (pillow_format, options) in VARIANT_FORMATS.items():
+            output = resized
+            if pillow_format == "JPEG" and output.mode != "RGB":
+                output = output.convert("RGB")
+            elif output.mode not in ("RGB", "RGBA"):
+                output = output.convert("RGBA")
+            buffer = BytesIO()
+            output.save(buffer, pillow_format, **options)
+            target = variant_name(name, width, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            variants[str(width)][fmt] = default_storage.save(target, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_urls(manifest, path):
+    """
+    URLs of every width/format of the image at ``path``.
+
+    Until the variants exist (or for widths larger than the image) the entries fall
+    back to the closest smaller variant, then to the original.
+    """
+    if not path:
+        return {}
+    rendered = (manifest or {}).get(storage_name(path)) or {}
+    urls, fallback = {}, {fmt: path for fmt in VARIANT_FORMATS}
+    for width in VARIANT_WIDTHS:
+        variants = rendered.get(str(width))
+        if variants:
+            fallback = {fmt: default_storage.url(name) for fmt, name in variants.items()}
+        urls[str(width)] = dict(fallback)
+    return urls
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2),
+                    thread_name_prefix="image-variants",
+                )
+    return _executor
+
+
+def pending_sources(instance):
+    manifest = instance.image_variants or {}
+    names = (storage_name(path) for path in instance.variant_sources())
+    return [name for name in dict.fromkeys(names) if name and name not in manifest]
+
+
+def schedule_variants(instance):
+    """Renders variants of the instance's new images in the worker pool once the transaction commits"""
+    sources = pending_sources(instance)
+    if not sources:
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: get_executor().submit(_process, model, pk, sources))
+
+
+def _process(model, pk, sources, rendered=None, attempt=1):
+    try:
+        if rendered is None:
+            rendered = {}
+            for name in sources:
+                try:
+                    rendered[name] = render_variants(name)
+                except OSError as exc:
+                    # Unreadable or missing image: recorded as processed so it is served as-is
+                    logger.warning("Could not render variants of %s: %s", name, exc)
+                    rendered[name] = {}
+
+        instance = _write_manifest(model, pk, rendered)
+        if instance is not None:
+            variants_ready.send(sender=model, instance=instance)
+    except DatabaseError:
+        if attempt < MAX_ATTEMPTS:
+            # The files are already rendered; only the manifest write is retried
+            logger.warning("Requeueing image variants for %s %s (attempt %d)", model.__name__, pk, attempt)
+            retry = threading.Timer(
+                RETRY_DELAY * 2 ** (attempt - 1),
+                lambda: get_executor().submit(_process, model, pk, sources, rendered, attempt + 1),
+            )
+            retry.daemon = True
+            retry.start()
+        else:
+            logger.exception("Gave up on image variants for %s %s", model.__name__, pk)
+    except Exception:
+        logger.exception("Failed to render image variants for %s %s", model.__name__, pk)
+    finally:
+        # Each job runs on the worker thread's own connection
+        connection.close()
+
+
+def _write_manifest(model, pk, rendered):
+    """
+    Merges the rendered variants into the instance's manifest; returns the updated instance (None if deleted).
+
+    The write is a single UPDATE guarded on the manifest read just before it, so no
+    transaction holds a read lock while waiting to write. On a concurrent change the
+    merge is redone against the new manifest.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None:
+            return None
+        previous = instance.image_variants or {}
+        current = {storage_name(path) for path in instance.variant_sources()}
+        manifest = {name: variants for name, variants in {**previous, **rendered}.items() if name in current}
+        if model.objects.filter(pk=pk, image_variants=instance.image_variants).update(image_variants=manifest):
+            instance.image_variants = manifest
+            return instance
+    raise DatabaseError(f"{model.__name__} {pk} manifest kept changing")
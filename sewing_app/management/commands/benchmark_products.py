@@ -0,0 +1,116 @@
+import random
+import re
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from sewing_app.models import Product
+from sewing_app.views import ProductViewSet
+
+SORTS = [None, "newest", "price_asc", "price_desc", "rating"]
+
+# Filter combinations sent by the storefront
+FILTERS = [
+    {},
+    {"category": "dress"},
+    {"category": "dress", "disponible": "true", "promo": "false", "min_price": "1000", "max_price": "20000"},
+]
+
+_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)|USING INTEGER PRIMARY KEY")
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads a synthetic catalog inside a rolled-back transaction and reports, for every "
+        "ProductViewSet sort and filter combination, the first-page and COUNT times and whether "
+        "SQLite reads the page in index order or sorts it in a temp B-tree"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (best is reported)")
+        parser.add_argument("--analyze", action="store_true", help="Run ANALYZE before querying")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark reads SQLite query plans")
+
+        with transaction.atomic():
+            self.load_catalog(options["rows"], options["seed"])
+            if options["analyze"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+            sorted_in_temp = 0
+            for filters in FILTERS:
+                for sort in SORTS:
+                    sorted_in_temp += not self.report(filters, sort, options["page_size"], options["repeat"])
+            # Leave the database as it was
+            transaction.set_rollback(True)
+
+        summary = f"{sorted_in_temp} combination(s) sorted in a temp B-tree"
+        self.stdout.write(self.style.ERROR(summary) if sorted_in_temp else self.style.SUCCESS(summary))
+
+    def load_catalog(self, rows, seed):
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        categories = [value for value, _ in Product.CATEGORY_CHOICES]
+        batch = []
+        for index in range(rows):
+            price = Decimal(rng.randrange(100, 100000))
+            promo = rng.random() < 0.1
+            batch.append(Product(
+                name=f"Product {index}",
+                owner=rng.randrange(1, max(2, rows // 50)),
+                category=rng.choice(categories),
+                price=price,
+                promo=promo,
+                promo_price=(price * Decimal("0.8")).quantize(Decimal("0.01")) if promo else None,
+                disponible=rng.random() < 0.9,
+                rating=Decimal(rng.randrange(0, 501)) / 100 if rng.random() < 0.7 else None,
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        # Spread creation times; bulk_create stamps every row with the same auto_now_add value
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE sewing_app_product SET created_at = datetime('now', '-' || (product_id * 7 % 525600) || ' minutes')"
+            )
+        self.stdout.write(f"Loaded {rows} products in {time.perf_counter() - started:.1f}s")
+
+    def report(self, filters, sort, page_size, repeat):
+        params = dict(filters, **({"sort": sort} if sort else {}))
+        view = ProductViewSet(action="list", request=Request(RequestFactory().get("/api/products/", params)),
+                              format_kwarg=None)
+        page = view.get_queryset()[:page_size]
+
+        plan = page.explain()
+        in_index_order = "TEMP B-TREE FOR ORDER BY" not in plan
+        match = _INDEX_RE.search(plan)
+        access = (match.group(1) or "primary key") if match else "rowid order"
+
+        page_time = self.best_time(lambda: list(page.all()), repeat)
+        # The paginator counts the filtered rows on every page
+        count_time = self.best_time(lambda: view.get_queryset().count(), repeat)
+
+        label = "&".join(f"{key}={value}" for key, value in params.items()) or "(no filters)"
+        line = f"{label:<90} page {page_time * 1000:7.2f} ms  count {count_time * 1000:7.2f} ms  {access:<26} "
+        line += "index order" if in_index_order else "TEMP B-TREE SORT"
+        self.stdout.write(line if in_index_order else self.style.WARNING(line))
+        return in_index_order
+
+    @staticmethod
+    def best_time(run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
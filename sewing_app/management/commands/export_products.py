@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from sewing_app.models import Product
+from sewing_app.product_io import FORMATS, export_products, guess_format
+
+
+class Command(BaseCommand):
+    help = "Streams the product catalog to a JSONL or CSV file (or stdout)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Output file, '-' for stdout")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension (jsonl otherwise)")
+        parser.add_argument("--owner", type=int)
+        parser.add_argument("--category")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.order_by("product_id")
+        if options["owner"] is not None:
+            queryset = queryset.filter(owner=options["owner"])
+        if options["category"]:
+            queryset = queryset.filter(category=options["category"])
+
+        fmt = options["format"] or guess_format(options["path"])
+        output = sys.stdout if options["path"] == "-" else open(options["path"], "w", encoding="utf-8", newline="")
+        try:
+            for chunk in export_products(queryset, fmt, chunk_size=options["chunk_size"]):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
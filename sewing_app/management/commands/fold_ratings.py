@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from sewing_app.models import ProductRating
+
+
+class Command(BaseCommand):
+    help = "Folds pending product ratings into the product counters (PRODUCT_RATING_DEFERRED mode)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        folded = 0
+        while True:
+            count = ProductRating.fold(batch_size=options["batch_size"])
+            if not count:
+                break
+            folded += count
+        self.stdout.write(self.style.SUCCESS(f"Folded {folded} rating(s)"))
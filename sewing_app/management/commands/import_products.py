@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sewing_app.product_io import FORMATS, guess_format, import_products, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Imports products from a JSONL or CSV file in validated, bulk-inserted chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension (jsonl otherwise)")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--max-errors", type=int, default=1000, help="Row errors to report")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or guess_format(options["path"])
+        try:
+            stream = open(options["path"], encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with stream:
+            result = import_products(
+                iter_rows(stream, fmt), chunk_size=options["chunk_size"], max_errors=options["max_errors"]
+            )
+
+        for error in result["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if result["errors_truncated"]:
+            self.stderr.write("... more errors not shown")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} product(s), {result['failed']} row(s) rejected"
+        ))
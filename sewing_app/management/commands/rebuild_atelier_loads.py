@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sewing_app.models import AtelierLoad
+
+
+class Command(BaseCommand):
+    help = "Recomputes every atelier's open order load from the orders (backfills, drift repair)"
+
+    def handle(self, *args, **options):
+        count = AtelierLoad.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the load of {count} atelier(s)"))
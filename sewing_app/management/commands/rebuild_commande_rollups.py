@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sewing_app.models import CommandeDailyRollup
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per atelier, day and status order rollups from the orders (backfills, drift repair)"
+
+    def handle(self, *args, **options):
+        count = CommandeDailyRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup row(s)"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:40
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_interactions(apps, schema_editor):
+    """Keeps only the most recent row for each directed pair before adding the constraint"""
+    UserInteraction = apps.get_model('sewing_app', 'UserInteraction')
+    keep_ids = (
+        UserInteraction.objects
+        .values('sender_id', 'sender_role', 'receiver_id', 'receiver_role')
+        .annotate(keep_id=Max('id'))
+        .values_list('keep_id', flat=True)
+    )
+    UserInteraction.objects.exclude(id__in=list(keep_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0007_message_userinteraction'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_interactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userinteraction',
+            constraint=models.UniqueConstraint(fields=('sender_id', 'sender_role', 'receiver_id', 'receiver_role'), name='userinteraction_pair_uniq'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0008_userinteraction_pair_uniq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender_id', 'sender_role', 'receiver_id', 'receiver_role', 'timestamp'], name='message_conversation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver_id', 'receiver_role', 'timestamp'], name='message_receiver_idx'),
+        ),
+    ]
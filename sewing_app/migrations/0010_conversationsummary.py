@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:44
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_summaries(apps, schema_editor):
+    """Builds inbox rows from existing history; past messages are treated as read"""
+    Message = apps.get_model('sewing_app', 'Message')
+    ConversationSummary = apps.get_model('sewing_app', 'ConversationSummary')
+
+    last_ids = {}
+    directed = (
+        Message.objects
+        .values('sender_id', 'sender_role', 'receiver_id', 'receiver_role')
+        .annotate(last_id=Max('id'))
+    )
+    for row in directed:
+        key = frozenset(((row['sender_id'], row['sender_role']), (row['receiver_id'], row['receiver_role'])))
+        last_ids[key] = max(last_ids.get(key, 0), row['last_id'])
+
+    summaries = []
+    for message in Message.objects.filter(id__in=list(last_ids.values())).iterator():
+        sides = [
+            (message.sender_id, message.sender_role, message.receiver_id, message.receiver_role, message.receiver_name, True),
+            (message.receiver_id, message.receiver_role, message.sender_id, message.sender_role, message.sender_name, False),
+        ]
+        for owner_id, owner_role, peer_id, peer_role, peer_name, from_owner in sides:
+            summaries.append(ConversationSummary(
+                owner_id=owner_id,
+                owner_role=owner_role,
+                peer_id=peer_id,
+                peer_role=peer_role,
+                peer_name=peer_name,
+                last_message_id=message.id,
+                last_message_preview=message.content[:100],
+                last_message_time=message.timestamp,
+                last_message_from_owner=from_owner,
+            ))
+    ConversationSummary.objects.bulk_create(summaries, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0009_message_conversation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('owner_id', models.IntegerField()),
+                ('owner_role', models.CharField(max_length=20)),
+                ('peer_id', models.IntegerField()),
+                ('peer_role', models.CharField(max_length=20)),
+                ('peer_name', models.CharField(blank=True, default='', max_length=255)),
+                ('last_message_id', models.IntegerField(blank=True, null=True)),
+                ('last_message_preview', models.CharField(blank=True, default='', max_length=100)),
+                ('last_message_time', models.DateTimeField(blank=True, null=True)),
+                ('last_message_from_owner', models.BooleanField(default=False)),
+                ('unread_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', 'owner_role', 'last_message_time'], name='conversation_inbox_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_id', 'owner_role', 'peer_id', 'peer_role'), name='conversation_summary_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:45
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def align_watermarks(apps, schema_editor):
+    """Conversations without unread messages are read up to their last message"""
+    ConversationSummary = apps.get_model('sewing_app', 'ConversationSummary')
+    ConversationSummary.objects.filter(unread_count=0, last_message_id__isnull=False).update(
+        last_read_message_id=F('last_message_id')
+    )
+    peer_row = ConversationSummary.objects.filter(
+        owner_id=OuterRef('peer_id'), owner_role=OuterRef('peer_role'),
+        peer_id=OuterRef('owner_id'), peer_role=OuterRef('owner_role'),
+    ).values('last_read_message_id')[:1]
+    ConversationSummary.objects.update(peer_last_read_message_id=Coalesce(Subquery(peer_row), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0010_conversationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_read_message_id',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='peer_last_read_message_id',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(align_watermarks, migrations.RunPython.noop),
+    ]
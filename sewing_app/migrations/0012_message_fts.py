@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:05
+
+from django.db import migrations
+
+from sewing_app.search import MESSAGE_FTS, drop_fts_index, install_fts_index
+
+
+def create_message_fts(apps, schema_editor):
+    install_fts_index(schema_editor, MESSAGE_FTS)
+
+
+def remove_message_fts(apps, schema_editor):
+    drop_fts_index(schema_editor, MESSAGE_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0011_conversationsummary_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_message_fts, remove_message_fts),
+    ]
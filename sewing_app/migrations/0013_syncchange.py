@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0012_message_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('message', 'Message'), ('interaction', 'User Interaction')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], default='upsert', max_length=10)),
+                ('sender_id', models.IntegerField()),
+                ('sender_role', models.CharField(max_length=20)),
+                ('receiver_id', models.IntegerField()),
+                ('receiver_role', models.CharField(max_length=20)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'seq'], name='syncchange_kind_idx'), models.Index(fields=['sender_id', 'sender_role', 'kind', 'seq'], name='syncchange_sender_idx'), models.Index(fields=['receiver_id', 'receiver_role', 'kind', 'seq'], name='syncchange_receiver_idx')],
+            },
+        ),
+    ]
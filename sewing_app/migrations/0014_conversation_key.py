@@ -0,0 +1,110 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:20
+
+from django.db import migrations, models
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast, Concat
+
+from sewing_app.search import MESSAGE_FTS, install_fts_index
+
+
+def endpoint(prefix):
+    return Concat(F(f'{prefix}_role'), Value(':'), Cast(F(f'{prefix}_id'), CharField()))
+
+
+def fill_conversation_keys(apps, schema_editor):
+    """Backfills conversation keys and merges the two directed interaction rows of each conversation"""
+    Message = apps.get_model('sewing_app', 'Message')
+    UserInteraction = apps.get_model('sewing_app', 'UserInteraction')
+    SyncChange = apps.get_model('sewing_app', 'SyncChange')
+
+    def log_change(interaction, op):
+        SyncChange.objects.create(
+            kind='interaction', object_id=interaction.id, op=op,
+            sender_id=interaction.sender_id, sender_role=interaction.sender_role,
+            receiver_id=interaction.receiver_id, receiver_role=interaction.receiver_role,
+        )
+
+    # Same ordering as sewing_app.models.conversation_key: by role, then numeric id
+    sender_first = Q(sender_role__lt=F('receiver_role')) | Q(sender_role=F('receiver_role'), sender_id__lte=F('receiver_id'))
+    Message.objects.filter(sender_first).update(
+        conversation_key=Concat(endpoint('sender'), Value('|'), endpoint('receiver'), output_field=CharField())
+    )
+    Message.objects.exclude(sender_first).update(
+        conversation_key=Concat(endpoint('receiver'), Value('|'), endpoint('sender'), output_field=CharField())
+    )
+
+    kept = {}
+    for interaction in UserInteraction.objects.order_by('-last_interaction_time', '-id').iterator():
+        first = (interaction.sender_role, interaction.sender_id)
+        second = (interaction.receiver_role, interaction.receiver_id)
+        if second < first:
+            first, second = second, first
+        key = f"{first[0]}:{first[1]}|{second[0]}:{second[1]}"
+        if key in kept:
+            # Older row for the other direction of the same conversation
+            log_change(interaction, 'delete')
+            interaction.delete()
+            continue
+        if (interaction.sender_role, interaction.sender_id) != first:
+            interaction.sender_id, interaction.receiver_id = interaction.receiver_id, interaction.sender_id
+            interaction.sender_role, interaction.receiver_role = interaction.receiver_role, interaction.sender_role
+            interaction.sender_name, interaction.receiver_name = interaction.receiver_name, interaction.sender_name
+            log_change(interaction, 'upsert')
+        kept[key] = interaction.id
+        UserInteraction.objects.filter(id=interaction.id).update(
+            conversation_key=key,
+            sender_id=interaction.sender_id,
+            sender_role=interaction.sender_role,
+            sender_name=interaction.sender_name,
+            receiver_id=interaction.receiver_id,
+            receiver_role=interaction.receiver_role,
+            receiver_name=interaction.receiver_name,
+        )
+
+
+def reinstall_message_fts(apps, schema_editor):
+    # Adding the column rebuilt the message table, which dropped the FTS triggers
+    install_fts_index(schema_editor, MESSAGE_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0013_syncchange'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='userinteraction',
+            name='userinteraction_pair_uniq',
+        ),
+        migrations.AddField(
+            model_name='userinteraction',
+            name='conversation_key',
+            field=models.CharField(max_length=80, null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation_key',
+            field=models.CharField(default='', max_length=80),
+        ),
+        migrations.RunPython(fill_conversation_keys, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_message_fts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userinteraction',
+            name='conversation_key',
+            field=models.CharField(max_length=80, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation_key', 'timestamp'], name='message_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinteraction',
+            index=models.Index(fields=['sender_id', 'sender_role', 'last_interaction_time'], name='interaction_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinteraction',
+            index=models.Index(fields=['receiver_id', 'receiver_role', 'last_interaction_time'], name='interaction_receiver_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0014_conversation_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userinteraction',
+            name='last_interaction_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
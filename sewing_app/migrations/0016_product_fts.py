@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:10
+
+from django.db import migrations
+
+from sewing_app.search import PRODUCT_FTS, drop_fts_index, install_fts_index
+
+
+def create_product_fts(apps, schema_editor):
+    install_fts_index(schema_editor, PRODUCT_FTS)
+
+
+def remove_product_fts(apps, schema_editor):
+    drop_fts_index(schema_editor, PRODUCT_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0015_interaction_time_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_fts, remove_product_fts),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:01
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0016_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRating',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('rating', models.DecimalField(decimal_places=2, max_digits=3, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)])),
+                ('folded', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='sewing_app.product')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('folded', False)), fields=['id'], name='productrating_pending_idx')],
+            },
+        ),
+    ]
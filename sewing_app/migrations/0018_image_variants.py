@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+from sewing_app.search import PRODUCT_FTS, install_fts_index
+
+
+def reinstall_product_fts(apps, schema_editor):
+    # Adding the column rebuilds sewing_app_product on SQLite, which drops the FTS triggers
+    install_fts_index(schema_editor, PRODUCT_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0017_productrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisementsatelier',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(reinstall_product_fts, migrations.RunPython.noop),
+    ]
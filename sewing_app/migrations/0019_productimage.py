@@ -0,0 +1,83 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:04
+
+import django.db.models.deletion
+import sewing_app.models
+from django.db import migrations, models
+
+from sewing_app.search import PRODUCT_FTS, install_fts_index
+
+
+def image_list_to_rows(apps, schema_editor):
+    Product = apps.get_model('sewing_app', 'Product')
+    ProductImage = apps.get_model('sewing_app', 'ProductImage')
+    MEDIA_URL = '/media/'
+    rows = []
+    for product in Product.objects.exclude(image_list=[]).iterator():
+        entries = [
+            (img.get('path'), bool(img.get('is_primary'))) if isinstance(img, dict) else (img, False)
+            for img in product.image_list or []
+        ]
+        entries = [(path, primary) for path, primary in entries if path]
+        if not entries:
+            continue
+        primary = next((index for index, (_, flag) in enumerate(entries) if flag), 0)
+        manifest = product.image_variants or {}
+        for position, (path, _) in enumerate(entries):
+            # Already rendered variants move with their image
+            name = path[len(MEDIA_URL):] if path.startswith(MEDIA_URL) else path
+            variants = {name: manifest[name]} if name in manifest else {}
+            rows.append(ProductImage(product_id=product.pk, path=path, position=position,
+                                     is_primary=position == primary, image_variants=variants))
+        if len(rows) >= 1000:
+            ProductImage.objects.bulk_create(rows)
+            rows = []
+    ProductImage.objects.bulk_create(rows)
+
+
+def rows_to_image_list(apps, schema_editor):
+    Product = apps.get_model('sewing_app', 'Product')
+    ProductImage = apps.get_model('sewing_app', 'ProductImage')
+    image_lists = {}
+    for image in ProductImage.objects.exclude(path='').order_by('product_id', 'position', 'id').iterator():
+        image_lists.setdefault(image.product_id, []).append({'path': image.path, 'is_primary': image.is_primary})
+    for product_id, image_list in image_lists.items():
+        Product.objects.filter(pk=product_id).update(image_list=image_list)
+
+
+def reinstall_product_fts(apps, schema_editor):
+    # Dropping the column rebuilds sewing_app_product on SQLite, which drops the FTS triggers
+    install_fts_index(schema_editor, PRODUCT_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0018_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImage',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('image', models.ImageField(blank=True, null=True, upload_to=sewing_app.models.product_gallery_path)),
+                ('path', models.CharField(blank=True, default='', max_length=500)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('is_primary', models.BooleanField(default=False)),
+                ('image_variants', models.JSONField(blank=True, default=dict, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='product_images', to='sewing_app.product')),
+            ],
+            options={
+                'ordering': ['position', 'id'],
+                'indexes': [models.Index(fields=['product', 'position'], name='productimage_position_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_primary', True)), fields=('product',), name='productimage_primary_uniq')],
+            },
+        ),
+        migrations.RunPython(image_list_to_rows, rows_to_image_list),
+        migrations.RemoveField(
+            model_name='product',
+            name='image_list',
+        ),
+        migrations.RunPython(reinstall_product_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+from sewing_app.search import PRODUCT_FTS, install_fts_index
+
+
+def reinstall_product_fts(apps, schema_editor):
+    # Altering owner rebuilds sewing_app_product on SQLite, which drops the FTS triggers
+    install_fts_index(schema_editor, PRODUCT_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0019_productimage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_owner_idx',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='owner',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at'], name='product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'created_at'], name='product_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'created_at'], name='product_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price'], name='product_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'rating'], name='product_cat_rating_idx'),
+        ),
+        migrations.RunPython(reinstall_product_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows have not changed since they were created as far as we know
+    for name in ('Atelier', 'Commandes'):
+        apps.get_model('sewing_app', name).objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0020_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atelier',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='commandes',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_loads(apps, schema_editor):
+    Atelier = apps.get_model('sewing_app', 'Atelier')
+    AtelierLoad = apps.get_model('sewing_app', 'AtelierLoad')
+    Commandes = apps.get_model('sewing_app', 'Commandes')
+    totals = {
+        row['atelier']: row for row in
+        Commandes.objects.filter(atelier__isnull=False).exclude(status__in=('completed', 'refused'))
+        .values('atelier').annotate(quantity=models.Sum('quantity'), orders=models.Count('pk'))
+    }
+    AtelierLoad.objects.bulk_create([
+        AtelierLoad(
+            atelier_id=atelier_id, capacity=capacity or 0,
+            open_quantity=totals.get(atelier_id, {}).get('quantity') or 0,
+            open_orders=totals.get(atelier_id, {}).get('orders') or 0,
+        )
+        for atelier_id, capacity in Atelier.objects.values_list('user_id', 'capacity')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0021_atelier_commandes_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtelierLoad',
+            fields=[
+                ('atelier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='load', serialize=False, to='sewing_app.atelier')),
+                ('capacity', models.IntegerField(default=0)),
+                ('open_quantity', models.IntegerField(default=0)),
+                ('open_orders', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_loads, migrations.RunPython.noop),
+    ]
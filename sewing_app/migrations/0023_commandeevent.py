@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0022_atelierload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('commande_id', models.IntegerField()),
+                ('client', models.IntegerField(blank=True, null=True)),
+                ('atelier', models.IntegerField(blank=True, null=True)),
+                ('from_status', models.CharField(blank=True, choices=[('in_progress', 'In Progress'), ('pending', 'Pending'), ('validated', 'Validated'), ('completed', 'Completed'), ('refused', 'Refused')], max_length=20, null=True)),
+                ('to_status', models.CharField(choices=[('in_progress', 'In Progress'), ('pending', 'Pending'), ('validated', 'Validated'), ('completed', 'Completed'), ('refused', 'Refused')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['atelier', 'id'], name='commandeevent_atelier_idx'), models.Index(fields=['client', 'id'], name='commandeevent_client_idx'), models.Index(fields=['commande_id', 'id'], name='commandeevent_commande_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0023_commandeevent'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='commandes',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='commandes',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In Progress'), ('pending', 'Pending'), ('validated', 'Validated'), ('completed', 'Completed'), ('refused', 'Refused')], default='in_progress', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='commandes',
+            index=models.Index(fields=['client', '-id_commande'], name='commandes_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commandes',
+            index=models.Index(fields=['atelier', '-id_commande'], name='commandes_atelier_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commandes',
+            index=models.Index(fields=['status', '-id_commande'], name='commandes_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commandes',
+            index=models.Index(fields=['atelier', 'status', 'deadline'], name='commandes_atelier_status_idx'),
+        ),
+    ]
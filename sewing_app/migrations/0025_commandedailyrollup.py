@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:25
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def build_rollups(apps, schema_editor):
+    Commandes = apps.get_model('sewing_app', 'Commandes')
+    CommandeDailyRollup = apps.get_model('sewing_app', 'CommandeDailyRollup')
+    rows = (
+        Commandes.objects.filter(atelier__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('atelier', 'day', 'status')
+        .annotate(
+            # Before quantity, so F('quantity') is still the order's column
+            revenue=Coalesce(
+                models.Sum(models.F('price') * models.F('quantity')),
+                models.Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+            orders=models.Count('pk'),
+            quantity=models.Sum('quantity'),
+        )
+        .order_by()
+    )
+    CommandeDailyRollup.objects.bulk_create([CommandeDailyRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0024_commandes_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandeDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('atelier', models.IntegerField()),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('pending', 'Pending'), ('validated', 'Validated'), ('completed', 'Completed'), ('refused', 'Refused')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('atelier', 'day', 'status'), name='commanderollup_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
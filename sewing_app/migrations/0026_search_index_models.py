@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:06
+
+import django.db.models.deletion
+import sewing_app.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sewing_app', '0025_commandedailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchIndex',
+            fields=[
+                ('message', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='sewing_app.message')),
+                ('document', sewing_app.search.FTSDocumentField(db_column='sewing_app_message_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'sewing_app_message_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearchIndex',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='sewing_app.product')),
+                ('document', sewing_app.search.FTSDocumentField(db_column='sewing_app_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'sewing_app_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,15 @@
 import datetime
+from decimal import Decimal
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, Group, Permission
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
 from django.contrib.auth.hashers import make_password
+from django.utils.timezone import localdate
+
+from .directory import participant_directory
+from .search import FTSDocumentField
+from .streams import publish_messages
+from .write_behind import interaction_buffer
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None, **extra_fields):
@@ -78,6 +86,7 @@ class Atelier(models.Model):
     store_name = models.CharField(max_length=255, blank=True, null=True)
     register_commerce = models.ImageField(upload_to=atelier_register_commerce_path, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -146,6 +155,12 @@ class Commandes(models.Model):
         ("completed", "Completed"),
         ("refused", "Refused"),
     ]
+    # Orders an atelier can still be assigned to
+    OPEN_STATUSES = ("in_progress", "pending")
+    # Orders that no longer count towards their atelier's load
+    CLOSED_STATUSES = ("completed", "refused")
+    # Fields whose stored values record_change() compares on save and delete
+    TRACKED_FIELDS = ("atelier", "client", "status", "quantity", "price", "created_at")
 
 
 
@@ -156,18 +171,269 @@ class Commandes(models.Model):
     product = models.IntegerField( null=True, blank=True )
     quantity = models.IntegerField()
     image_command = models.ImageField(upload_to="orders/", blank=True, null=True)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="in_progress", db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="in_progress")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateTimeField()
     price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     address = models.TextField()
 
     class Meta:
-        unique_together = ("id_commande", "client", "atelier")
+        indexes = [
+            # Listings filter on one of these columns and page newest first
+            models.Index(fields=["client", "-id_commande"], name="commandes_client_idx"),
+            models.Index(fields=["atelier", "-id_commande"], name="commandes_atelier_idx"),
+            models.Index(fields=["status", "-id_commande"], name="commandes_status_idx"),
+            # An atelier's orders in one status by deadline (?atelier=&status=&sort=deadline)
+            models.Index(fields=["atelier", "status", "deadline"], name="commandes_atelier_status_idx"),
+        ]
 
     def __str__(self):
         return f"Commande {self.id_commande} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        # The stored state read in pre_save, the write and the record_change() bookkeeping
+        # in post_save commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def tracked_state(self):
+        """The fields behind atelier loads, daily rollups and the event log, as set on the instance"""
+        return {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
+
+    @classmethod
+    def stored_state(cls, commande_id):
+        """The tracked fields as currently stored, or None if the order does not exist"""
+        if commande_id is None:
+            return None
+        return cls.objects.filter(pk=commande_id).values(*cls.TRACKED_FIELDS).first()
+
+    @classmethod
+    def load_contribution(cls, state):
+        """(atelier, quantity) an order in ``state`` adds to an AtelierLoad, or None"""
+        if state is None or state["atelier"] is None or state["status"] in cls.CLOSED_STATUSES:
+            return None
+        return state["atelier"], state["quantity"] or 0
+
+    @classmethod
+    def rollup_contribution(cls, state):
+        """((atelier, day, status), quantity, revenue) an order in ``state`` adds to the daily rollups, or None"""
+        if state is None or state["atelier"] is None or state["created_at"] is None:
+            return None
+        quantity = int(state["quantity"] or 0)
+        revenue = Decimal(str(state["price"] or 0)) * quantity
+        return (state["atelier"], localdate(state["created_at"]), state["status"]), quantity, revenue
+
+    @classmethod
+    def record_change(cls, commande_id, previous, current):
+        """
+        Applies a change of an order's tracked fields to the atelier loads, the daily
+        rollups and the status event log. ``previous`` is None for a new order and
+        ``current`` None for a deleted one.
+        """
+        AtelierLoad.adjust(cls.load_contribution(previous), cls.load_contribution(current))
+        CommandeDailyRollup.adjust(cls.rollup_contribution(previous), cls.rollup_contribution(current))
+        if current is not None:
+            CommandeEvent.record(
+                commande_id, current["client"], current["atelier"],
+                previous and previous["status"], current["status"], previous and previous["atelier"],
+            )
+
+
+class CommandeEvent(models.Model):
+    """
+    Append-only log of order status transitions behind GET /api/commandes/events/.
+
+    ``from_status`` is null for the order's creation. ``atelier`` is the atelier the
+    order is assigned to after the transition, or the one it was taken from, so a
+    refusal still reaches the refusing atelier's feed. The id is the feed position.
+    """
+    id = models.BigAutoField(primary_key=True)
+    commande_id = models.IntegerField()
+    client = models.IntegerField(null=True, blank=True)
+    atelier = models.IntegerField(null=True, blank=True)
+    from_status = models.CharField(max_length=20, choices=Commandes.STATUS_CHOICES, null=True, blank=True)
+    to_status = models.CharField(max_length=20, choices=Commandes.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["atelier", "id"], name="commandeevent_atelier_idx"),
+            models.Index(fields=["client", "id"], name="commandeevent_client_idx"),
+            models.Index(fields=["commande_id", "id"], name="commandeevent_commande_idx"),
+        ]
+
+    @classmethod
+    def record(cls, commande_id, client, atelier, from_status, to_status, previous_atelier=None):
+        """Appends a transition; no-op when the status did not change"""
+        if from_status == to_status:
+            return None
+        return cls.objects.create(
+            commande_id=commande_id, client=client, atelier=atelier if atelier is not None else previous_atelier,
+            from_status=from_status, to_status=to_status,
+        )
+
+    def __str__(self):
+        return f"Commande {self.commande_id}: {self.from_status} -> {self.to_status}"
+
+
+class AtelierLoad(models.Model):
+    """
+    Open work of an atelier, kept current as orders are assigned, changed and closed.
+
+    ``capacity`` mirrors Atelier.capacity, read as the pieces the atelier can make per
+    day; ``open_quantity`` is the quantity of its assigned orders that are not completed
+    or refused. Order signals and the assignment engine adjust the counters with F()
+    updates; ``rebuild()`` (manage.py rebuild_atelier_loads) recomputes them from scratch.
+    """
+    atelier = models.OneToOneField(Atelier, on_delete=models.CASCADE, primary_key=True, related_name="load")
+    capacity = models.IntegerField(default=0)
+    open_quantity = models.IntegerField(default=0)
+    open_orders = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Load of atelier {self.atelier_id}: {self.open_quantity}/{self.capacity}"
+
+    @classmethod
+    def adjust(cls, removed=None, added=None):
+        """Moves an order's contribution (see Commandes.load_contribution) between loads"""
+        if removed == added:
+            return
+        for contribution, sign in ((removed, -1), (added, 1)):
+            if contribution is not None:
+                atelier_id, quantity = contribution
+                cls.objects.filter(atelier_id=atelier_id).update(
+                    open_quantity=models.F("open_quantity") + sign * quantity,
+                    open_orders=models.F("open_orders") + sign,
+                    updated_at=now(),
+                )
+
+    @classmethod
+    def rebuild(cls):
+        """Recomputes every load from the orders; returns the number of ateliers"""
+        with transaction.atomic():
+            totals = {
+                row["atelier"]: row for row in
+                Commandes.objects.filter(atelier__isnull=False).exclude(status__in=Commandes.CLOSED_STATUSES)
+                .values("atelier").annotate(quantity=models.Sum("quantity"), orders=models.Count("pk"))
+            }
+            loads = [
+                cls(
+                    atelier_id=atelier_id, capacity=capacity or 0,
+                    open_quantity=totals.get(atelier_id, {}).get("quantity") or 0,
+                    open_orders=totals.get(atelier_id, {}).get("orders") or 0,
+                )
+                for atelier_id, capacity in Atelier.objects.values_list("user_id", "capacity")
+            ]
+            cls.objects.all().delete()
+            cls.objects.bulk_create(loads, batch_size=1000)
+        return len(loads)
+
+    @classmethod
+    def suggest(cls, quantity, deadline, limit=10):
+        """
+        Active ateliers that can finish ``quantity`` more pieces by ``deadline``, best first.
+
+        An atelier's free capacity is what it can still make before the deadline once its
+        open orders are done (capacity x days left - open quantity); ateliers are ranked by
+        it, so idle ones come before busy ones. Reads one row per atelier, however many
+        orders are open.
+        """
+        days = max((deadline - now()).total_seconds() / 86400, 0)
+        free_capacity = models.ExpressionWrapper(
+            models.F("capacity") * models.Value(days) - models.F("open_quantity"),
+            output_field=models.FloatField(),
+        )
+        return (
+            cls.objects.filter(atelier__is_active=True, capacity__gt=0)
+            .annotate(free_capacity=free_capacity)
+            .filter(free_capacity__gte=quantity)
+            .select_related("atelier")
+            .order_by("-free_capacity", "open_orders", "atelier_id")[:limit]
+        )
+
+
+class CommandeDailyRollup(models.Model):
+    """
+    Order counts, quantity and revenue (price x quantity) per atelier, creation day and status.
+
+    Kept current by Commandes.record_change as orders are created, assigned, updated and
+    deleted, so dashboards read a few rows instead of aggregating the orders; ``rebuild()``
+    (manage.py rebuild_commande_rollups) recomputes them from scratch. Unassigned orders
+    are not counted.
+    """
+    atelier = models.IntegerField()
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Commandes.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["atelier", "day", "status"], name="commanderollup_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Atelier {self.atelier} on {self.day} ({self.status}): {self.orders} order(s)"
+
+    @classmethod
+    def adjust(cls, removed=None, added=None):
+        """Moves an order's contribution (see Commandes.rollup_contribution) between rollup rows"""
+        deltas = {}
+        for contribution, sign in ((removed, -1), (added, 1)):
+            if contribution is not None:
+                key, quantity, revenue = contribution
+                orders, total_quantity, total_revenue = deltas.get(key, (0, 0, Decimal("0")))
+                deltas[key] = (orders + sign, total_quantity + sign * quantity, total_revenue + sign * revenue)
+
+        for (atelier, day, status), (orders, quantity, revenue) in deltas.items():
+            if not (orders or quantity or revenue):
+                continue
+            row = cls.objects.filter(atelier=atelier, day=day, status=status)
+            increments = {
+                "orders": models.F("orders") + orders,
+                "quantity": models.F("quantity") + quantity,
+                "revenue": models.F("revenue") + revenue,
+            }
+            if row.update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        atelier=atelier, day=day, status=status, orders=orders, quantity=quantity, revenue=revenue
+                    )
+            except IntegrityError:
+                # Created concurrently by another order of the same day
+                row.update(**increments)
+
+    @classmethod
+    def rebuild(cls):
+        """Recomputes every rollup row from the orders; returns the number of rows"""
+        with transaction.atomic():
+            rows = [
+                cls(**row) for row in
+                Commandes.objects.filter(atelier__isnull=False)
+                .annotate(day=TruncDate("created_at"))
+                .values("atelier", "day", "status")
+                .annotate(
+                    # Before quantity, so F("quantity") is still the order's column
+                    revenue=Coalesce(
+                        models.Sum(models.F("price") * models.F("quantity")),
+                        models.Value(Decimal("0")),
+                        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+                    ),
+                    orders=models.Count("pk"),
+                    quantity=models.Sum("quantity"),
+                )
+                .order_by()
+            ]
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
 from django.db import models
 from django.utils.timezone import now
 
@@ -189,37 +455,78 @@ class DemandeAtelier(models.Model):
 
     @staticmethod
     def assign_first_atelier(commande_id):
-        """Assigns the first atelier that requested the order."""
+        """
+        Assigns the order to the atelier of its earliest pending request.
+
+        The order is claimed with a conditional UPDATE, so when several callers race only
+        one of them finds it still open; the winning request is then accepted and every
+        other pending request rejected in one statement. Returns the accepted request, or
+        None if the order was already taken, is closed or has no pending request.
+        """
         first_request = DemandeAtelier.objects.filter(
-            commande_id=commande_id, status="pending"
-        ).order_by("created_at").first()
-
-        if first_request:
-            # Update Commande table
-            from .models import Commande  # Avoid circular import
-
-            commande = Commande.objects.get(commande_id=commande_id)
-            commande.atelier_id = first_request.atelier_id
-            commande.status = "validated"
-            commande.save()
-
-            # Mark this demande as accepted
-            first_request.status = "accepted"
-            first_request.save()
+            commande_id=models.OuterRef("pk"), status="pending"
+        ).order_by("created_at", "demande_id")
+        pending = DemandeAtelier.objects.filter(commande_id=commande_id, status="pending")
+        claimable = Commandes.objects.filter(pk=commande_id, atelier__isnull=True).filter(models.Exists(first_request))
+
+        with transaction.atomic():
+            # One conditional UPDATE per open status (at most one matches), so the logged
+            # transition knows the status it left without a racy read beforehand
+            for from_status in Commandes.OPEN_STATUSES:
+                claimed = claimable.filter(status=from_status).update(
+                    atelier=models.Subquery(first_request.values("atelier_id")[:1]),
+                    status="validated",
+                    updated_at=now(),
+                )
+                if claimed:
+                    break
+            else:
+                # Requests that arrived after another one won are turned down too
+                pending.filter(
+                    models.Exists(Commandes.objects.filter(pk=commande_id, atelier__isnull=False))
+                ).update(status="rejected")
+                return None
+
+            # The claim holds the order's row lock, so the earliest request is settled
+            current = Commandes.objects.filter(pk=commande_id).values(*Commandes.TRACKED_FIELDS).get()
+            winner = pending.filter(atelier_id=current["atelier"]).order_by("created_at", "demande_id").first()
+            if winner is None:
+                # The request was withdrawn while the order was being claimed
+                transaction.set_rollback(True)
+                return None
+            pending.update(status=models.Case(
+                models.When(pk=winner.pk, then=models.Value("accepted")),
+                default=models.Value("rejected"),
+            ))
+            Commandes.record_change(commande_id, {**current, "atelier": None, "status": from_status}, current)
+        winner.status = "accepted"
+        return winner
 
     @staticmethod
-    def reset_commande_on_refusal(commande_id):
-        """Resets the commande if the atelier refuses after being assigned."""
-        from .models import Commande  # Avoid circular import
-
-        # Remove all demandes for this commande
-        DemandeAtelier.objects.filter(commande_id=commande_id).delete()
-
-        # Reset the commande
-        commande = Commande.objects.get(commande_id=commande_id)
-        commande.atelier_id = None
-        commande.status = "pending"
-        commande.save()
+    def reset_commande_on_refusal(commande_id, atelier_id=None):
+        """
+        Reopens an assigned order when its atelier refuses it and drops its requests.
+
+        With ``atelier_id`` only a refusal from the assigned atelier is honoured.
+        Returns False if the order was not assigned (to that atelier) or is already closed.
+        """
+        with transaction.atomic():
+            assigned = Commandes.objects.filter(pk=commande_id, atelier__isnull=False).exclude(
+                status__in=Commandes.CLOSED_STATUSES
+            )
+            if atelier_id is not None:
+                assigned = assigned.filter(atelier=atelier_id)
+            previous = assigned.values(*Commandes.TRACKED_FIELDS).first()
+            if previous is None:
+                return False
+            # Conditional on the values just read, in case the order changed meanwhile
+            if not assigned.filter(atelier=previous["atelier"], status=previous["status"]).update(
+                atelier=None, status="pending", updated_at=now()
+            ):
+                return False
+            DemandeAtelier.objects.filter(commande_id=commande_id).delete()
+            Commandes.record_change(commande_id, previous, {**previous, "atelier": None, "status": "pending"})
+        return True
 
 from django.db import models
 from django.utils.timezone import now
@@ -305,7 +612,12 @@ class DemandeFabricStore(models.Model):
 
 from django.db import models
 import json
+from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Cast
+from django.utils.functional import cached_property
+from .catalog import bump_catalog_versions, product_scopes
+from .images import schedule_variants
 
 def product_image_path(instance, filename):
     # Get the file extension
@@ -323,7 +635,7 @@ class Product(models.Model):
     ]   
     product_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, default="Product")  # This is the field causing the error
-    owner = models.IntegerField(db_index=True)  # Better indexing
+    owner = models.IntegerField()  # Indexed by product_owner_created_idx
     disponible = models.BooleanField(default=True)
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
@@ -331,123 +643,149 @@ class Product(models.Model):
     promo = models.BooleanField(default=False)
     promo_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, validators=[MinValueValidator(0)])
     image = models.ImageField(upload_to=product_image_path, blank=True, null=True)
-    image_list = models.JSONField(default=list, blank=True)  # Use JSONField instead of TextField
     rating = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True, 
                                 validators=[MinValueValidator(0), MaxValueValidator(5)])
     total_ratings = models.IntegerField(default=0)
     rating_sum = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)  # Track creation time
     updated_at = models.DateTimeField(auto_now=True)  # Track updates
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # Resized copies, see images.py
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so moving a product also invalidates its old owner/category listings
+        instance._loaded_scope = (instance.__dict__.get("owner"), instance.__dict__.get("category"))
+        return instance
+
+    def variant_sources(self):
+        """The legacy upload field; gallery images carry their own variants (ProductImage)"""
+        return [self.image.name] if self.image else []
+
     def get_image_list(self):
-        """Returns the list of image paths"""
-        return self.image_list or []
+        """Returns the gallery images in display order"""
+        return list(self.product_images.all())
     
     def set_image_list(self, images):
-        """Sets the list of image paths"""
-        self.image_list = images
+        """Replaces the gallery with the given image paths; the first one becomes primary"""
+        with transaction.atomic():
+            self.product_images.all().delete()
+            created = ProductImage.objects.bulk_create([
+                ProductImage(product=self, path=image_path, position=position, is_primary=position == 0)
+                for position, image_path in enumerate(
+                    img.get('path') if isinstance(img, dict) else img for img in images
+                )
+            ])
+            for product_image in created:
+                schedule_variants(product_image)
+        self._images_changed()
     
-    def add_image(self, image_path, make_primary=False):
-        """Add an image path to the image list"""
-        images = self.get_image_list()
-        # Mark first image or requested image as primary
-        is_primary = make_primary or len(images) == 0
-        
-        # If making this primary, unmark any other image
-        if is_primary and images:
-            # Check if the other images in the list have 'is_primary' attribute
-            for i, img in enumerate(images):
-                if isinstance(img, dict) and img.get('is_primary'):
-                    img['is_primary'] = False
-        
-        # Add image as dict with is_primary flag
-        if isinstance(image_path, str):
-            image_entry = {'path': image_path, 'is_primary': is_primary}
-        else:
-            image_entry = image_path
-            image_entry['is_primary'] = is_primary
-            
-        images.append(image_entry)
-        self.set_image_list(images)
-        self.save()
-        return len(images) - 1  # Return index of added image
+    def add_image(self, image, make_primary=False):
+        """
+        Adds an image (an uploaded file or a path) at the end of the gallery and returns it.
+
+        The first image, or one added with make_primary, becomes the primary image.
+        """
+        if isinstance(image, dict):
+            make_primary = make_primary or image.get('is_primary', False)
+            image = image.get('path')
+        with transaction.atomic():
+            last = self.product_images.aggregate(last=models.Max("position"))["last"]
+            is_primary = make_primary or last is None
+            if is_primary and last is not None:
+                self.product_images.filter(is_primary=True).update(is_primary=False)
+            source = {"path": image} if isinstance(image, str) else {"image": image}
+            product_image = ProductImage.objects.create(
+                product=self, position=0 if last is None else last + 1, is_primary=is_primary, **source
+            )
+        self._images_changed()
+        return product_image
     
-    def remove_image(self, index):
-        """Remove an image at the specified index"""
-        images = self.get_image_list()
-        if 0 <= index < len(images):
-            removed = images.pop(index)
-            
-            # If we removed the primary image, set first remaining image as primary
-            was_primary = isinstance(removed, dict) and removed.get('is_primary', False)
-            if was_primary and images:
-                # Mark the first image as primary
-                if isinstance(images[0], dict):
-                    images[0]['is_primary'] = True
-                else:
-                    # Convert to dict if it's a string
-                    images[0] = {'path': images[0], 'is_primary': True}
-                    
-            self.set_image_list(images)
-            self.save()
-            return removed
-        return None
+    def remove_image(self, image_id):
+        """Removes a gallery image; if it was primary the first remaining image takes over"""
+        with transaction.atomic():
+            removed = self.product_images.filter(pk=image_id).first()
+            if removed is None:
+                return None
+            removed.delete()
+            if removed.is_primary:
+                first = self.product_images.order_by("position", "id").values("pk")[:1]
+                ProductImage.objects.filter(pk__in=models.Subquery(first)).update(is_primary=True)
+        self._images_changed()
+        return removed
     
-    def set_primary_image(self, index):
-        """Set the primary image by index"""
-        images = self.get_image_list()
-        if 0 <= index < len(images):
-            # Unmark all images
-            for i, img in enumerate(images):
-                if isinstance(img, dict):
-                    img['is_primary'] = False
-                else:
-                    # Convert string to dict
-                    images[i] = {'path': img, 'is_primary': False}
-                    
-            # Mark the selected image as primary
-            if isinstance(images[index], dict):
-                images[index]['is_primary'] = True
-            else:
-                images[index] = {'path': images[index], 'is_primary': True}
-                
-            self.set_image_list(images)
-            self.save()
-            return True
-        return False
+    def set_primary_image(self, image_id):
+        """Makes a gallery image the primary one"""
+        with transaction.atomic():
+            if not self.product_images.filter(pk=image_id).exists():
+                return False
+            # Clear first: the partial unique index allows one primary image at a time
+            self.product_images.filter(is_primary=True).exclude(pk=image_id).update(is_primary=False)
+            self.product_images.filter(pk=image_id).update(is_primary=True)
+        self._images_changed()
+        return True
+
+    def _images_changed(self):
+        self.__dict__.pop("primary_image_record", None)
+        Product.objects.filter(pk=self.pk).update(updated_at=now())
+        scopes = product_scopes(self)
+        transaction.on_commit(lambda: bump_catalog_versions(scopes))
+
+    @cached_property
+    def primary_image_record(self):
+        """The primary ProductImage, taken from the gallery when list views prefetched it"""
+        gallery = getattr(self, "_prefetched_objects_cache", {}).get("product_images")
+        if gallery is not None:
+            return next((image for image in gallery if image.is_primary), None)
+        return self.product_images.filter(is_primary=True).first()
     
     @property
     def primary_image(self):
         """Returns the primary image path or legacy image"""
-        images = self.get_image_list()
-        if images:
-            # Look for image with is_primary flag
-            for img in images:
-                if isinstance(img, dict) and img.get('is_primary'):
-                    return img.get('path')
-            
-            # Default to first image if no primary found
-            if isinstance(images[0], dict):
-                return images[0].get('path')
-            return images[0]
-        
+        record = self.primary_image_record
+        if record is not None:
+            return record.url
         return self.image.url if self.image else None
     
+    @staticmethod
+    def rating_updates(count, total):
+        """UPDATE assignments adding ``count`` ratings summing to ``total`` to the counters"""
+        return {
+            "total_ratings": models.F("total_ratings") + count,
+            "rating_sum": models.F("rating_sum") + total,
+            # Both sides read the pre-update columns, so the average always matches the counters
+            "rating": Cast(models.F("rating_sum") + total, models.FloatField()) / (models.F("total_ratings") + count),
+            "updated_at": now(),
+        }
+
     def add_rating(self, new_rating):
-        """Add a customer rating to this product"""
+        """
+        Records a customer rating as a ProductRating event.
+
+        The counters and average are updated in a single UPDATE (no read-modify-write),
+        or later by ProductRating.fold() when settings.PRODUCT_RATING_DEFERRED is on.
+        """
+        new_rating = Decimal(str(new_rating))
         if not 0 <= new_rating <= 5:
             raise ValueError("Rating must be between 0 and 5")
-            
-        self.total_ratings += 1
-        self.rating_sum += new_rating
-        self.calculate_rating()
+
+        deferred = getattr(settings, "PRODUCT_RATING_DEFERRED", False)
+        with transaction.atomic():
+            ProductRating.objects.create(product_id=self.pk, rating=new_rating, folded=not deferred)
+            if not deferred:
+                Product.objects.filter(pk=self.pk).update(**self.rating_updates(1, new_rating))
+                scopes = product_scopes(self)
+                transaction.on_commit(lambda: bump_catalog_versions(scopes))
+        if not deferred:
+            self.refresh_from_db(fields=["total_ratings", "rating_sum", "rating", "updated_at"])
         return self.rating
         
     def calculate_rating(self):
         """Recalculate product rating based on total ratings and sum"""
-        if self.total_ratings > 0:
-            self.rating = self.rating_sum / self.total_ratings
-            self.save()
+        Product.objects.filter(pk=self.pk, total_ratings__gt=0).update(
+            rating=Cast(models.F("rating_sum"), models.FloatField()) / models.F("total_ratings")
+        )
+        self.refresh_from_db(fields=["rating"])
         return self.rating
 
     def apply_promo(self, new_price):
@@ -480,17 +818,135 @@ class Product(models.Model):
         return 0
 
     class Meta:
+        # Each listing sort (default -created_at, price, rating, newest = -product_id) has an
+        # index that returns rows already in order, alone or after the category/owner filter;
+        # disponible and promo are then checked on the index-ordered rows. A price range is
+        # the exception: SQLite range-scans (category, price) for it, so category + price
+        # range with the default, newest or rating sort (e.g. category + disponible + promo +
+        # min/max_price) sorts the matching rows in a temp B-tree. Only the price sorts stay
+        # in index order there. (category, disponible, promo, <sort>) indexes do not change
+        # the plan, even after ANALYZE. See `manage.py benchmark_products`.
         indexes = [
             models.Index(fields=["promo"], name="product_promo_idx"),
-            models.Index(fields=["owner"], name="product_owner_idx"),
             models.Index(fields=["category"], name="product_category_idx"),
             models.Index(fields=["rating"], name="product_rating_idx"),
+            models.Index(fields=["created_at"], name="product_created_idx"),
+            models.Index(fields=["price"], name="product_price_idx"),
+            models.Index(fields=["owner", "created_at"], name="product_owner_created_idx"),
+            models.Index(fields=["category", "created_at"], name="product_cat_created_idx"),
+            models.Index(fields=["category", "price"], name="product_cat_price_idx"),
+            models.Index(fields=["category", "rating"], name="product_cat_rating_idx"),
         ]
         ordering = ['-created_at']
 
     def __str__(self):
         return f"{self.name} ({self.category}) - {self.product_id}"
 
+
+def product_gallery_path(instance, filename):
+    return f"products/{instance.product.category}/{instance.product_id}_{filename}"
+
+
+class ProductImage(models.Model):
+    """
+    One image of a product's gallery: an uploaded file or a path/URL.
+
+    ``position`` orders the gallery, and a partial unique index allows at most one
+    primary image per product, so the primary images of a page of products are one
+    indexed lookup.
+    """
+    id = models.AutoField(primary_key=True)
+    # Indexed through productimage_position_idx (product first)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="product_images", db_index=False)
+    image = models.ImageField(upload_to=product_gallery_path, blank=True, null=True)
+    path = models.CharField(max_length=500, blank=True, default="")
+    position = models.PositiveIntegerField(default=0)
+    is_primary = models.BooleanField(default=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # Resized copies, see images.py
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["position", "id"]
+        indexes = [
+            models.Index(fields=["product", "position"], name="productimage_position_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["product"], condition=models.Q(is_primary=True),
+                                    name="productimage_primary_uniq"),
+        ]
+
+    @property
+    def url(self):
+        return self.image.url if self.image else (self.path or None)
+
+    def variant_sources(self):
+        return [self.image.name if self.image else self.path]
+
+    def as_dict(self):
+        return {"id": self.id, "path": self.url, "is_primary": self.is_primary, "position": self.position}
+
+    def __str__(self):
+        return f"Image {self.position} of product {self.product_id}"
+
+
+class ProductRating(models.Model):
+    """
+    A single customer rating of a product.
+
+    Product.total_ratings, rating_sum and rating are running aggregates of these rows.
+    Rows with folded=False (deferred mode) are not counted yet; fold() adds them in batches.
+    """
+    id = models.AutoField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="ratings")
+    rating = models.DecimalField(max_digits=3, decimal_places=2,
+                                 validators=[MinValueValidator(0), MaxValueValidator(5)])
+    folded = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(folded=False), name="productrating_pending_idx"),
+        ]
+
+    @classmethod
+    def fold(cls, batch_size=5000):
+        """
+        Adds a batch of pending ratings to their products' counters.
+
+        All touched products are updated in one UPDATE; returns the number of ratings folded.
+        """
+        with transaction.atomic():
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True).filter(folded=False)
+                .order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+            totals = list(
+                cls.objects.filter(id__in=ids).values("product_id")
+                .annotate(count=models.Count("id"), total=models.Sum("rating"))
+            )
+            count = models.Case(
+                *[models.When(pk=t["product_id"], then=models.Value(t["count"])) for t in totals],
+                output_field=models.IntegerField(),
+            )
+            total = models.Case(
+                *[models.When(pk=t["product_id"], then=models.Value(t["total"])) for t in totals],
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            )
+            product_ids = [t["product_id"] for t in totals]
+            Product.objects.filter(pk__in=product_ids).update(**Product.rating_updates(count, total))
+            cls.objects.filter(id__in=ids).update(folded=True)
+
+            scopes = []
+            for product in Product.objects.filter(pk__in=product_ids).only("owner", "category"):
+                scopes.extend(product_scopes(product))
+            transaction.on_commit(lambda: bump_catalog_versions(list(dict.fromkeys(scopes))))
+        return len(ids)
+
+    def __str__(self):
+        return f"{self.rating} for product {self.product_id}"
+
 from django.db import models
 
 def advertisement_image_path(instance, filename):
@@ -507,6 +963,7 @@ class AdvertisementsAtelier(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     owner = models.IntegerField()
     image = models.ImageField(upload_to=advertisement_image_path, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # Resized copies, see images.py
 
     class Meta:
         indexes = [
@@ -514,56 +971,313 @@ class AdvertisementsAtelier(models.Model):
             models.Index(fields=["created_at"]),
         ]
 
+    def variant_sources(self):
+        return [self.image.name] if self.image else []
+
     def __str__(self):
         return self.title
 
 
 
+class SyncChange(models.Model):
+    """
+    Append-only change log behind the ``?since=<token>`` delta sync of messages and interactions.
+
+    Every created, updated or deleted row appends an entry; the sequence number is the
+    sync position, and the sender/receiver columns scope a feed to one participant.
+    """
+    KIND_CHOICES = [
+        ("message", "Message"),
+        ("interaction", "User Interaction"),
+    ]
+    OP_CHOICES = [
+        ("upsert", "Upsert"),
+        ("delete", "Delete"),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES, default="upsert")
+    sender_id = models.IntegerField()
+    sender_role = models.CharField(max_length=20)
+    receiver_id = models.IntegerField()
+    receiver_role = models.CharField(max_length=20)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "seq"], name="syncchange_kind_idx"),
+            models.Index(fields=["sender_id", "sender_role", "kind", "seq"], name="syncchange_sender_idx"),
+            models.Index(fields=["receiver_id", "receiver_role", "kind", "seq"], name="syncchange_receiver_idx"),
+        ]
+
+    @classmethod
+    def entry(cls, kind, obj, op="upsert"):
+        return cls(
+            kind=kind,
+            object_id=obj.pk,
+            op=op,
+            sender_id=obj.sender_id,
+            sender_role=obj.sender_role,
+            receiver_id=obj.receiver_id,
+            receiver_role=obj.receiver_role,
+        )
+
+    @classmethod
+    def log(cls, entries):
+        """Appends several change entries with one INSERT"""
+        cls.objects.bulk_create(list(entries))
+
+    def __str__(self):
+        return f"Change {self.seq}: {self.op} {self.kind} {self.object_id}"
+
+
+def conversation_key(first_id, first_role, second_id, second_role):
+    """Order-independent key identifying the conversation between two participants"""
+    endpoints = sorted([(first_role, int(first_id)), (second_role, int(second_id))])
+    return "|".join(f"{role}:{user_id}" for role, user_id in endpoints)
+
+
 class UserInteraction(models.Model):
+    """
+    One row per conversation, identified by its canonical ``conversation_key``.
+
+    The sender/receiver columns are stored in canonical order (see ``canonicalize``),
+    so either participant may appear on either side.
+    """
     id = models.AutoField(primary_key=True)
+    conversation_key = models.CharField(max_length=80, unique=True)
     sender_id = models.IntegerField()
     receiver_id = models.IntegerField()
     sender_role = models.CharField(max_length=20)
     receiver_role = models.CharField(max_length=20)
     sender_name = models.CharField(max_length=255)
     receiver_name = models.CharField(max_length=255)
-    last_interaction_time = models.DateTimeField(auto_now=True)
-    
+    # Set explicitly (save() touches it, write-behind flushes use the message time)
+    last_interaction_time = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sender_id", "sender_role", "last_interaction_time"], name="interaction_sender_idx"),
+            models.Index(fields=["receiver_id", "receiver_role", "last_interaction_time"], name="interaction_receiver_idx"),
+        ]
+
+    def canonicalize(self):
+        """Orders the two participants canonically and fills in the conversation key"""
+        if (self.receiver_role, int(self.receiver_id)) < (self.sender_role, int(self.sender_id)):
+            self.sender_id, self.receiver_id = self.receiver_id, self.sender_id
+            self.sender_role, self.receiver_role = self.receiver_role, self.sender_role
+            self.sender_name, self.receiver_name = self.receiver_name, self.sender_name
+        self.conversation_key = conversation_key(self.sender_id, self.sender_role, self.receiver_id, self.receiver_role)
+        return self
+
     def save(self, *args, **kwargs):
-        # Get sender name based on role
-        if self.sender_role == "client":
-            sender = Client.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        elif self.sender_role == "atelier":
-            sender = Atelier.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        elif self.sender_role == "fabric_store":
-            sender = FabricStore.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        
-        # Get receiver name based on role
-        if self.receiver_role == "client":
-            receiver = Client.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-        elif self.receiver_role == "atelier":
-            receiver = Atelier.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-        elif self.receiver_role == "fabric_store":
-            receiver = FabricStore.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-                
+        # Resolve names through the shared directory instead of querying each role table
+        self.sender_name = participant_directory.get_name(self.sender_role, self.sender_id) or self.sender_name
+        self.receiver_name = participant_directory.get_name(self.receiver_role, self.receiver_id) or self.receiver_name
+        self.canonicalize()
+        self.last_interaction_time = now()
         super().save(*args, **kwargs)
-    
+        SyncChange.log([SyncChange.entry("interaction", self)])
+
+    @classmethod
+    def record(cls, messages):
+        """
+        Queues the interaction bumps for a batch of messages once the transaction commits.
+
+        The rows are written by the write-behind buffer (see write_behind.py).
+        """
+        interactions = [
+            cls(
+                sender_id=message.sender_id,
+                receiver_id=message.receiver_id,
+                sender_role=message.sender_role,
+                receiver_role=message.receiver_role,
+                sender_name=message.sender_name,
+                receiver_name=message.receiver_name,
+                last_interaction_time=message.timestamp,
+            ).canonicalize()
+            for message in messages
+        ]
+        transaction.on_commit(lambda: interaction_buffer.add(interactions))
+
+    @classmethod
+    def apply_bumps(cls, interactions):
+        """
+        Writes a batch of coalesced bumps: creates missing rows, then moves every
+        last_interaction_time forward (never backwards) and refreshes names in one UPDATE.
+        """
+        keys = [interaction.conversation_key for interaction in interactions]
+
+        def per_key(value_of):
+            return models.Case(
+                *[models.When(conversation_key=i.conversation_key, then=models.Value(value_of(i)))
+                  for i in interactions]
+            )
+
+        with transaction.atomic():
+            cls.objects.bulk_create(interactions, ignore_conflicts=True)
+            cls.objects.filter(conversation_key__in=keys).update(
+                last_interaction_time=Greatest(
+                    models.F("last_interaction_time"),
+                    models.Case(
+                        *[models.When(conversation_key=i.conversation_key,
+                                      then=models.Value(i.last_interaction_time))
+                          for i in interactions],
+                        output_field=models.DateTimeField(),
+                    ),
+                ),
+                sender_name=per_key(lambda i: i.sender_name),
+                receiver_name=per_key(lambda i: i.receiver_name),
+            )
+            ids = dict(cls.objects.filter(conversation_key__in=keys).values_list("conversation_key", "id"))
+            for interaction in interactions:
+                interaction.pk = ids.get(interaction.conversation_key)
+            SyncChange.log(SyncChange.entry("interaction", i) for i in interactions if i.pk is not None)
+
     def __str__(self):
         return f"Interaction between {self.sender_name} and {self.receiver_name}"
 
 
+class ConversationSummary(models.Model):
+    """
+    One inbox row per participant and peer, maintained incrementally as messages are sent.
+
+    Each conversation has two rows (one per side) so that a participant's inbox is a
+    single range scan over (owner, last_message_time).
+    """
+    PREVIEW_LENGTH = 100
+
+    id = models.AutoField(primary_key=True)
+    owner_id = models.IntegerField()
+    owner_role = models.CharField(max_length=20)
+    peer_id = models.IntegerField()
+    peer_role = models.CharField(max_length=20)
+    peer_name = models.CharField(max_length=255, blank=True, default="")
+    last_message_id = models.IntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default="")
+    last_message_time = models.DateTimeField(null=True, blank=True)
+    last_message_from_owner = models.BooleanField(default=False)
+    unread_count = models.IntegerField(default=0)
+    # Read watermarks: everything up to this message id has been read by the owner / by the peer
+    last_read_message_id = models.IntegerField(default=0)
+    peer_last_read_message_id = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner_id", "owner_role", "peer_id", "peer_role"],
+                name="conversation_summary_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["owner_id", "owner_role", "last_message_time"], name="conversation_inbox_idx"),
+        ]
+
+    @classmethod
+    def for_pair(cls, first_id, first_role, second_id, second_role):
+        """Both sides of the conversation between two participants"""
+        return cls.objects.filter(
+            models.Q(owner_id=first_id, owner_role=first_role, peer_id=second_id, peer_role=second_role) |
+            models.Q(owner_id=second_id, owner_role=second_role, peer_id=first_id, peer_role=first_role)
+        )
+
+    @classmethod
+    def record(cls, messages):
+        """Advances the summaries of every conversation touched by a batch of new messages"""
+        conversations = {}
+        for message in messages:
+            sender = (message.sender_id, message.sender_role)
+            receiver = (message.receiver_id, message.receiver_role)
+            key = frozenset((sender, receiver))
+            state = conversations.setdefault(key, {"last": message, "received": {}, "names": {}})
+            if (message.timestamp, message.id) >= (state["last"].timestamp, state["last"].id):
+                state["last"] = message
+            state["received"][receiver] = state["received"].get(receiver, 0) + 1
+            state["names"][sender] = message.sender_name
+            state["names"][receiver] = message.receiver_name
+
+        for state in conversations.values():
+            last = state["last"]
+            sender = (last.sender_id, last.sender_role)
+            receiver = (last.receiver_id, last.receiver_role)
+            is_sender_row = models.Q(owner_id=last.sender_id, owner_role=last.sender_role)
+
+            def apply(**extra):
+                # One statement updates both sides of the conversation
+                return cls.for_pair(*sender, *receiver).filter(**extra).update(
+                    last_message_id=last.id,
+                    last_message_preview=last.content[:cls.PREVIEW_LENGTH],
+                    last_message_time=last.timestamp,
+                    last_message_from_owner=models.Case(
+                        models.When(is_sender_row, then=models.Value(True)),
+                        default=models.Value(False),
+                    ),
+                    peer_name=models.Case(
+                        models.When(is_sender_row, then=models.Value(state["names"][receiver])),
+                        default=models.Value(state["names"][sender]),
+                    ),
+                    unread_count=models.F("unread_count") + models.Case(
+                        models.When(is_sender_row, then=models.Value(state["received"].get(sender, 0))),
+                        default=models.Value(state["received"].get(receiver, 0)),
+                    ),
+                )
+
+            if apply() < 2:
+                # First message of this conversation: create the missing side(s) and fill them in
+                cls.objects.bulk_create(
+                    [
+                        cls(owner_id=sender[0], owner_role=sender[1], peer_id=receiver[0], peer_role=receiver[1]),
+                        cls(owner_id=receiver[0], owner_role=receiver[1], peer_id=sender[0], peer_role=sender[1]),
+                    ],
+                    ignore_conflicts=True,
+                )
+                apply(last_message_id__isnull=True)
+
+    @classmethod
+    def mark_read(cls, owner_id, owner_role, peer_id, peer_role, up_to=None):
+        """
+        Advances the owner's read watermark to ``up_to`` (default: the last message).
+
+        A single UPDATE moves the owner's watermark and unread counter and records the
+        read receipt on the peer's row. Watermarks never move backwards.
+        """
+        is_owner_row = models.Q(owner_id=owner_id, owner_role=owner_role)
+        if up_to is None:
+            watermark = models.F("last_message_id")
+            unread = models.Value(0)
+        else:
+            watermark = Least(models.Value(up_to), models.F("last_message_id"))
+            # Only the still-unread tail of the conversation is counted
+            remaining = Message.objects.filter(
+                sender_id=peer_id, sender_role=peer_role,
+                receiver_id=owner_id, receiver_role=owner_role,
+                id__gt=up_to,
+            ).order_by().values("receiver_id").annotate(total=models.Count("id")).values("total")
+            unread = models.Case(
+                models.When(last_message_id__lte=up_to, then=models.Value(0)),
+                default=Coalesce(models.Subquery(remaining), models.Value(0)),
+            )
+
+        return cls.for_pair(owner_id, owner_role, peer_id, peer_role).filter(
+            (is_owner_row & models.Q(last_read_message_id__lt=watermark)) |
+            (~is_owner_row & models.Q(peer_last_read_message_id__lt=watermark))
+        ).update(
+            last_read_message_id=models.Case(
+                models.When(is_owner_row, then=watermark), default=models.F("last_read_message_id"),
+            ),
+            unread_count=models.Case(
+                models.When(is_owner_row, then=unread), default=models.F("unread_count"),
+            ),
+            peer_last_read_message_id=models.Case(
+                models.When(is_owner_row, then=models.F("peer_last_read_message_id")), default=watermark,
+            ),
+        )
+
+    def __str__(self):
+        return f"Conversation of {self.owner_role} {self.owner_id} with {self.peer_name or self.peer_id}"
+
+
 class Message(models.Model):
     id = models.AutoField(primary_key=True)
     sender_id = models.IntegerField()
@@ -574,51 +1288,80 @@ class Message(models.Model):
     receiver_name = models.CharField(max_length=255)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    
+    conversation_key = models.CharField(max_length=80, default="")
+
+    class Meta:
+        indexes = [
+            # Serves the whole two-way history of a conversation in timestamp order
+            models.Index(fields=["conversation_key", "timestamp"], name="message_history_idx"),
+            # Serves each direction of a conversation (sender -> receiver) in timestamp order
+            models.Index(
+                fields=["sender_id", "sender_role", "receiver_id", "receiver_role", "timestamp"],
+                name="message_conversation_idx",
+            ),
+            models.Index(fields=["receiver_id", "receiver_role", "timestamp"], name="message_receiver_idx"),
+        ]
+
+    def resolve_names(self):
+        """Fills sender/receiver names through the shared directory instead of querying each role table"""
+        self.sender_name = participant_directory.get_name(self.sender_role, self.sender_id) or self.sender_name
+        self.receiver_name = participant_directory.get_name(self.receiver_role, self.receiver_id) or self.receiver_name
+        self.conversation_key = conversation_key(self.sender_id, self.sender_role, self.receiver_id, self.receiver_role)
+
     def save(self, *args, **kwargs):
-        # Get sender name based on role
-        if self.sender_role == "client":
-            sender = Client.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        elif self.sender_role == "atelier":
-            sender = Atelier.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        elif self.sender_role == "fabric_store":
-            sender = FabricStore.objects.filter(user_id=self.sender_id).first()
-            if sender:
-                self.sender_name = sender.name
-        
-        # Get receiver name based on role
-        if self.receiver_role == "client":
-            receiver = Client.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-        elif self.receiver_role == "atelier":
-            receiver = Atelier.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-        elif self.receiver_role == "fabric_store":
-            receiver = FabricStore.objects.filter(user_id=self.receiver_id).first()
-            if receiver:
-                self.receiver_name = receiver.name
-                
-        # Also update the corresponding UserInteraction
-        interaction, created = UserInteraction.objects.get_or_create(
-            sender_id=self.sender_id,
-            receiver_id=self.receiver_id,
-            sender_role=self.sender_role,
-            receiver_role=self.receiver_role,
-            defaults={
-                'sender_name': self.sender_name,
-                'receiver_name': self.receiver_name
-            }
-        )
-        interaction.last_interaction_time = self.timestamp
-        interaction.save()
-                
-        super().save(*args, **kwargs)
-    
+        adding = self._state.adding
+        self.resolve_names()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Also bump the corresponding UserInteraction (written behind, in batches)
+            UserInteraction.record([self])
+            if adding:
+                ConversationSummary.record([self])
+                publish_messages([self])
+            SyncChange.log([SyncChange.entry("message", self)])
+
+    @classmethod
+    def bulk_send(cls, messages):
+        """Inserts many messages with one bulk INSERT and queues their interaction bumps together"""
+        for message in messages:
+            message.resolve_names()
+        with transaction.atomic():
+            created = cls.objects.bulk_create(messages)
+            UserInteraction.record(created)
+            ConversationSummary.record(created)
+            publish_messages(created)
+            SyncChange.log(SyncChange.entry("message", message) for message in created)
+        return created
+
     def __str__(self):
         return f"Message from {self.sender_name} to {self.receiver_name}"
+
+
+class ProductSearchIndex(models.Model):
+    """
+    Read-only view of the product FTS5 index (search.PRODUCT_FTS), joined to Product on
+    rowid so search.fts_search() can filter on MATCH and order by ``rank``.
+    """
+    product = models.OneToOneField(
+        Product, primary_key=True, db_column="rowid", on_delete=models.DO_NOTHING, related_name="search_index"
+    )
+    document = FTSDocumentField(db_column="sewing_app_product_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False  # Created by search.install_fts_index
+        db_table = "sewing_app_product_fts"
+
+
+class MessageSearchIndex(models.Model):
+    """Read-only view of the message FTS5 index (search.MESSAGE_FTS), see ProductSearchIndex"""
+    message = models.OneToOneField(
+        Message, primary_key=True, db_column="rowid", on_delete=models.DO_NOTHING, related_name="search_index"
+    )
+    document = FTSDocumentField(db_column="sewing_app_message_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False  # Created by search.install_fts_index
+        db_table = "sewing_app_message_fts"
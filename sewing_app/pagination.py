@@ -1,6 +1,91 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class CustomPagination(PageNumberPagination):
     page_size = 10  # Default items per page
     page_size_query_param = "page_size"  # Allow client to specify page size
     max_page_size = 200  # Limit max page size
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (timestamp, id) driven by ``?before=<id>`` / ``?after=<id>``.
+
+    Pages are fetched by seeking into an index from the cursor row instead of
+    OFFSET + COUNT(*), so page N costs the same as page 1.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    cursor_field = "timestamp"
+
+    def is_requested(self, request):
+        return "before" in request.query_params or "after" in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _get_cursor(self, model, param, request):
+        raw = request.query_params.get(param)
+        try:
+            cursor_id = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({param: "Must be a message id"})
+        value = model.objects.filter(pk=cursor_id).values_list(self.cursor_field, flat=True).first()
+        if value is None:
+            raise ValidationError({param: f"No message found with ID {cursor_id}"})
+        return cursor_id, value
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        field = self.cursor_field
+        newer = "before" not in request.query_params
+
+        if newer:
+            cursor_id, value = self._get_cursor(queryset.model, "after", request)
+            rows = list(
+                queryset.filter(**{f"{field}__gte": value}).exclude(**{field: value, "id__lte": cursor_id})
+                .order_by(field, "id")[:size + 1]
+            )
+        else:
+            cursor_id, value = self._get_cursor(queryset.model, "before", request)
+            rows = list(
+                queryset.filter(**{f"{field}__lte": value}).exclude(**{field: value, "id__gte": cursor_id})
+                .order_by(f"-{field}", "-id")[:size + 1]
+            )
+
+        self.has_more = len(rows) > size
+        page = rows[:size]
+        if newer:
+            page.reverse()  # Always return newest first, like the regular listing
+        self.newer = newer
+        self.page = page
+        return page
+
+    def get_next_link(self):
+        """Link to the next (older) page"""
+        if not self.page or (not self.newer and not self.has_more):
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), "after")
+        return replace_query_param(url, "before", self.page[-1].pk)
+
+    def get_previous_link(self):
+        """Link to the previous (newer) page"""
+        if not self.page or (self.newer and not self.has_more):
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), "before")
+        return replace_query_param(url, "after", self.page[0].pk)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
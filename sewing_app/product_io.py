@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework import serializers
+
+from .catalog import bump_catalog_versions
+from .images import schedule_variants
+from .models import Product, ProductImage
+from .serializers import ProductImportSerializer
+
+FORMATS = ("jsonl", "csv")
+
+EXPORT_FIELDS = [
+    "product_id", "name", "owner", "disponible", "description", "category", "price",
+    "promo", "promo_price", "rating", "total_ratings", "created_at", "updated_at", "images",
+]
+
+# CSV cells holding several image paths separate them with this character
+CSV_LIST_SEPARATOR = "|"
+
+
+def guess_format(filename, default="jsonl"):
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    return extension if extension in FORMATS else default
+
+
+def iter_rows(stream, fmt):
+    """
+    Yields (line number, row dict or None, parse error or None) from a text stream.
+
+    Rows are parsed one at a time, so the stream is never loaded into memory.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells fall back to the field defaults
+            row = {key: value for key, value in row.items() if key and value not in ("", None)}
+            if "images" in row:
+                row["images"] = [path for path in row["images"].split(CSV_LIST_SEPARATOR) if path]
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_chunk(valid):
+    """Inserts one validated chunk: one bulk insert for products and one for their images"""
+    with transaction.atomic():
+        products = Product.objects.bulk_create([
+            Product(**{key: value for key, value in data.items() if key != "images"}) for data in valid
+        ])
+        product_images = ProductImage.objects.bulk_create([
+            ProductImage(product=product, path=path, position=position, is_primary=position == 0)
+            for product, data in zip(products, valid)
+            for position, path in enumerate(data.get("images", []))
+        ])
+        for product_image in product_images:
+            schedule_variants(product_image)
+        # bulk_create skips the save signals that normally invalidate cached listings
+        scopes = {("owner", product.owner) for product in products} | {("category", product.category) for product in products}
+        transaction.on_commit(lambda: bump_catalog_versions(list(scopes)))
+    return len(products)
+
+
+def _until_decode_error(rows, result):
+    """Yields rows until the stream hits bytes that are not UTF-8, recorded in the result"""
+    try:
+        yield from rows
+    except UnicodeDecodeError as exc:
+        result["encoding_error"] = f"File must be UTF-8 encoded ({exc.reason})"
+
+
+def import_products(rows, chunk_size=500, max_errors=1000):
+    """
+    Validates and inserts parsed rows (see iter_rows) chunk by chunk.
+
+    Rows are validated by one reused serializer and each chunk is written in its own
+    transaction, so a bad row only rejects itself. Returns {"created", "failed", "errors",
+    "errors_truncated", "encoding_error"}; errors are {"line", "errors"} in line order and
+    at most ``max_errors`` are kept. Undecodable input stops the import after the rows
+    read before it, with "encoding_error" set and "created" counting what was committed.
+    """
+    result = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False, "encoding_error": None}
+
+    def fail(line_number, errors):
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"line": line_number, "errors": errors})
+        else:
+            result["errors_truncated"] = True
+
+    validator = ProductImportSerializer()
+    for chunk in _chunks(_until_decode_error(rows, result), chunk_size):
+        valid = []
+        for line_number, row, error in chunk:
+            if error is not None:
+                fail(line_number, {"non_field_errors": [error]})
+                continue
+            try:
+                valid.append(validator.run_validation(row))
+            except serializers.ValidationError as exc:
+                fail(line_number, exc.detail)
+        if valid:
+            result["created"] += _write_chunk(valid)
+    return result
+
+
+def _export_row(product):
+    row = {field: getattr(product, field) for field in EXPORT_FIELDS if field != "images"}
+    row["images"] = [image.url for image in product.product_images.all() if image.url]
+    if product.image and not row["images"]:
+        row["images"] = [product.image.url]
+    return row
+
+
+def export_products(queryset, fmt="jsonl", chunk_size=2000):
+    """
+    Yields the products of ``queryset`` as JSONL lines or CSV rows.
+
+    Rows are read with a server-side chunked iterator (images prefetched per chunk),
+    so memory stays flat whatever the catalog size.
+    """
+    products = queryset.prefetch_related("product_images").iterator(chunk_size=chunk_size)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for product in products:
+            row = _export_row(product)
+            row["images"] = CSV_LIST_SEPARATOR.join(row["images"])
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():
+            # Empty export: header only
+            yield buffer.getvalue()
+        return
+
+    for product in products:
+        yield json.dumps(_export_row(product), cls=DjangoJSONEncoder) + "\n"
@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection, models
+
+# External-content FTS5 indexes kept in sync with their source table by triggers
+MESSAGE_FTS = {
+    "table": "sewing_app_message",
+    "fts_table": "sewing_app_message_fts",
+    "pk": "id",
+    "columns": ["content"],
+    # Reverse one-to-one from the source model to its index model (see MessageSearchIndex)
+    "relation": "search_index",
+}
+
+PRODUCT_FTS = {
+    "table": "sewing_app_product",
+    "fts_table": "sewing_app_product_fts",
+    "pk": "product_id",
+    "columns": ["name", "description", "category"],
+    # Prefix indexes keep search-as-you-type queries on short prefixes cheap
+    "prefix": "2 3",
+    "relation": "search_index",
+}
+
+_TOKEN_RE = re.compile(r"\w[\w\-./#]*", re.UNICODE)
+
+# Shorter trailing terms are matched exactly: a one-letter prefix expands to most of the index
+MIN_PREFIX_LENGTH = 2
+
+
+class FTSDocumentField(models.TextField):
+    """
+    The hidden column named after an FTS5 table, which MATCH queries the whole row through.
+
+    Only usable in filters, with the ``match`` lookup; index models declare it with
+    ``db_column`` set to their table name.
+    """
+
+
+@FTSDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def fts_available(using=None):
+    return (using or connection).vendor == "sqlite"
+
+
+def _fts_statements(spec):
+    table, fts_table, pk = spec["table"], spec["fts_table"], spec["pk"]
+    columns = ", ".join(spec["columns"])
+    new_values = ", ".join(f"new.{column}" for column in spec["columns"])
+    old_values = ", ".join(f"old.{column}" for column in spec["columns"])
+    prefix = f", prefix='{spec['prefix']}'" if spec.get("prefix") else ""
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{columns}, content='{table}', content_rowid='{pk}', tokenize='unicode61 remove_diacritics 2'{prefix})",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.{pk}, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.{pk}, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.{pk}, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.{pk}, {new_values}); END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def install_fts_index(schema_editor, spec):
+    """
+    Creates (or repairs) an FTS5 index and its sync triggers, then rebuilds it.
+
+    Safe to run repeatedly. Migrations that make Django rebuild the source table
+    (which drops its triggers on SQLite) must call this again afterwards.
+    """
+    if not fts_available(schema_editor.connection):
+        return
+    for statement in _fts_statements(spec):
+        schema_editor.execute(statement)
+
+
+def drop_fts_index(schema_editor, spec):
+    if not fts_available(schema_editor.connection):
+        return
+    fts_table = spec["fts_table"]
+    for suffix in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+def fts_query(text):
+    """
+    Turns free text into a safe FTS5 query: every term must match, the last one as a
+    prefix (when it has at least MIN_PREFIX_LENGTH characters).
+
+    Terms are quoted so user input can never be parsed as FTS5 syntax; a term such
+    as an order number "CMD-1024" becomes a phrase over its tokens.
+    """
+    terms = _TOKEN_RE.findall(text or "")
+    if not terms:
+        return None
+    quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def fts_search(queryset, spec, text):
+    """Restricts a queryset to FTS matches, annotated with ``rank`` (lower is better) and ordered by it"""
+    query = fts_query(text)
+    if query is None:
+        return queryset.none()
+    # Joined on rowid so the index is scanned once and each match carries its rank;
+    # a correlated rank subquery would rerun the whole MATCH per matching row
+    relation = spec["relation"]
+    return (
+        queryset.filter(**{f"{relation}__document__match": query})
+        .annotate(rank=models.F(f"{relation}__rank"))
+        .order_by("rank", "-pk")
+    )
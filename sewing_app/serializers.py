@@ -1,15 +1,33 @@
 from rest_framework import serializers
 from .models import (
-    Client, Atelier, FabricStore, Commandes, DemandeAtelier,
+    Client, Atelier, AtelierLoad, FabricStore, Commandes, CommandeEvent, DemandeAtelier,
     CommandeAtelierFabricStore, DemandeFabricStore, Product, AdvertisementsAtelier,
-UserInteraction,Message
+UserInteraction,Message,ConversationSummary
 )
+from .images import variant_urls
+
+
+def absolute_variant_urls(request, urls):
+    """Makes the URLs returned by images.variant_urls absolute for the current request"""
+    if request is None:
+        return urls
+    return {width: {fmt: request.build_absolute_uri(url) for fmt, url in formats.items()}
+            for width, formats in urls.items()}
+
+
+def primary_image_variant_urls(request, product):
+    record = product.primary_image_record
+    if record is not None:
+        urls = variant_urls(record.image_variants, record.url)
+    else:
+        urls = variant_urls(product.image_variants, product.image.url if product.image else None)
+    return absolute_variant_urls(request, urls)
 
 class UserInteractionSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserInteraction
         fields = '__all__'
-        read_only_fields = ['sender_name', 'receiver_name', 'last_interaction_time']
+        read_only_fields = ['conversation_key', 'sender_name', 'receiver_name', 'last_interaction_time']
 
 class UserInteractionListSerializer(serializers.ModelSerializer):
     """Serializer for retrieving user interactions with limited fields"""
@@ -17,11 +35,23 @@ class UserInteractionListSerializer(serializers.ModelSerializer):
         model = UserInteraction
         fields = ('receiver_id', 'receiver_role','receiver_name', 'last_interaction_time')
 
+    def to_representation(self, instance):
+        # Rows are stored in canonical order; always present the other participant as the receiver
+        participant = self.context.get('participant')
+        if participant and (str(instance.receiver_id), instance.receiver_role) == (str(participant[0]), participant[1]):
+            return {
+                'receiver_id': instance.sender_id,
+                'receiver_role': instance.sender_role,
+                'receiver_name': instance.sender_name,
+                'last_interaction_time': serializers.DateTimeField().to_representation(instance.last_interaction_time),
+            }
+        return super().to_representation(instance)
+
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = '__all__'
-        read_only_fields = ['sender_name', 'receiver_name', 'timestamp']
+        read_only_fields = ['sender_name', 'receiver_name', 'timestamp', 'conversation_key']
 
 class MessageListSerializer(serializers.ModelSerializer):
     """Serializer for retrieving messages with limited fields"""
@@ -30,6 +60,15 @@ class MessageListSerializer(serializers.ModelSerializer):
         fields = ('id', 'content', 'timestamp', 'sender_id', 'sender_role')
 
 
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    """Serializer for inbox rows"""
+    class Meta:
+        model = ConversationSummary
+        fields = ('peer_id', 'peer_role', 'peer_name', 'last_message_id', 'last_message_preview',
+                  'last_message_time', 'last_message_from_owner', 'unread_count',
+                  'last_read_message_id', 'peer_last_read_message_id')
+
+
 class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
@@ -40,6 +79,22 @@ class AtelierSerializer(serializers.ModelSerializer):
         model = Atelier
         fields = '__all__'
 
+class AtelierSuggestionQuerySerializer(serializers.Serializer):
+    """Query parameters of the suggested ateliers endpoint"""
+    quantity = serializers.IntegerField(min_value=1)
+    deadline = serializers.DateTimeField()
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+class AtelierSuggestionSerializer(serializers.ModelSerializer):
+    """An atelier ranked by AtelierLoad.suggest"""
+    name = serializers.CharField(source='atelier.name', read_only=True)
+    store_name = serializers.CharField(source='atelier.store_name', read_only=True)
+    free_capacity = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = AtelierLoad
+        fields = ['atelier', 'name', 'store_name', 'capacity', 'open_quantity', 'open_orders', 'free_capacity']
+
 class FabricStoreSerializer(serializers.ModelSerializer):
     class Meta:
         model = FabricStore
@@ -50,6 +105,34 @@ class CommandeSerializer(serializers.ModelSerializer):
         model = Commandes
         fields = '__all__'
 
+class CommandeListQuerySerializer(serializers.Serializer):
+    """Query parameters of the command listing"""
+    user = serializers.IntegerField(required=False)
+    atelier = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Commandes.STATUS_CHOICES, required=False)
+    deadline_after = serializers.DateTimeField(required=False)
+    deadline_before = serializers.DateTimeField(required=False)
+    sort = serializers.ChoiceField(choices=['newest', 'deadline'], default='newest')
+
+class CommandeStatsQuerySerializer(serializers.Serializer):
+    """Query parameters of the command statistics endpoint"""
+    atelier = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+class CommandeStatsSerializer(serializers.Serializer):
+    """Order counts, quantity and revenue of one day and status, read from CommandeDailyRollup"""
+    day = serializers.DateField(required=False)
+    status = serializers.CharField()
+    orders = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class CommandeEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CommandeEvent
+        fields = '__all__'
+
 class DemandeAtelierSerializer(serializers.ModelSerializer):
     class Meta:
         model = DemandeAtelier
@@ -66,12 +149,29 @@ class DemandeFabricStoreSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    image_list = serializers.ListField(required=False, write_only=True)
+class ProductBaseSerializer(serializers.ModelSerializer):
+    """Computed product fields shared by the detail (ProductSerializer) and list representations"""
     images = serializers.SerializerMethodField()
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     discount_percentage = serializers.IntegerField(read_only=True)
     primary_image_url = serializers.SerializerMethodField()
+    primary_image_variants = serializers.SerializerMethodField()
+
+    def get_images(self, obj):
+        return [image.as_dict() for image in obj.get_image_list()]
+
+    def get_primary_image_url(self, obj):
+        request = self.context.get('request', None)
+        primary_image = obj.primary_image
+        if request is not None and primary_image:
+            return request.build_absolute_uri(primary_image)
+        return None
+
+    def get_primary_image_variants(self, obj):
+        return primary_image_variant_urls(self.context.get('request', None), obj)
+
+class ProductSerializer(ProductBaseSerializer):
+    image_list = serializers.ListField(required=False, write_only=True)
     
     class Meta:
         model = Product
@@ -80,19 +180,10 @@ class ProductSerializer(serializers.ModelSerializer):
             'category', 'price', 'promo', 'promo_price', 'image',
             'rating', 'total_ratings', 'rating_sum',
             'created_at', 'updated_at', 'image_list', 'images',
-            'current_price', 'discount_percentage', 'primary_image_url'
+            'current_price', 'discount_percentage', 'primary_image_url',
+            'primary_image_variants'
         ]
         read_only_fields = ['rating', 'total_ratings', 'rating_sum', 'created_at', 'updated_at']
-    
-    def get_images(self, obj):
-        return obj.get_image_list()
-    
-    def get_primary_image_url(self, obj):
-        request = self.context.get('request', None)
-        primary_image = obj.primary_image
-        if request is not None and primary_image:
-            return request.build_absolute_uri(primary_image)
-        return None
         
     def validate(self, data):
         """
@@ -129,7 +220,57 @@ class ProductSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class ProductListSerializer(ProductBaseSerializer):
+    """
+    Read-only product representation for listings, with the same fields as ProductSerializer.
+
+    ``projection`` lists every model field the serializer reads (including the ones
+    behind current_price, discount_percentage and the primary image); the list view
+    loads exactly these columns, and prefetches the galleries of the page, so no row
+    triggers a query of its own.
+    """
+    projection = [
+        'product_id', 'name', 'owner', 'disponible', 'description', 'category', 'price',
+        'promo', 'promo_price', 'image', 'image_variants', 'rating', 'total_ratings',
+        'rating_sum', 'created_at', 'updated_at',
+    ]
+
+    class Meta:
+        model = Product
+        fields = [
+            'product_id', 'name', 'owner', 'disponible', 'description',
+            'category', 'price', 'promo', 'promo_price', 'image',
+            'rating', 'total_ratings', 'rating_sum',
+            'created_at', 'updated_at', 'images',
+            'current_price', 'discount_percentage', 'primary_image_url',
+            'primary_image_variants'
+        ]
+        read_only_fields = fields
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk product import (see product_io.py)"""
+    images = serializers.ListField(child=serializers.CharField(max_length=500), required=False)
+
+    class Meta:
+        model = Product
+        fields = [
+            'name', 'owner', 'disponible', 'description', 'category',
+            'price', 'promo', 'promo_price', 'images'
+        ]
+
+    def validate(self, data):
+        if data.get('promo') and data.get('promo_price') and data.get('price'):
+            if data['promo_price'] >= data['price']:
+                raise serializers.ValidationError({"promo_price": "Promotional price must be less than regular price"})
+        return data
+
 class AdvertisementsAtelierSerializer(serializers.ModelSerializer):
+    image_variant_urls = serializers.SerializerMethodField()
+
     class Meta:
         model = AdvertisementsAtelier
-        fields = '__all__'
+        exclude = ['image_variants']
+
+    def get_image_variant_urls(self, obj):
+        urls = variant_urls(obj.image_variants, obj.image.url if obj.image else None)
+        return absolute_variant_urls(self.context.get('request', None), urls)
@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .catalog import bump_catalog_versions, product_scopes
+from .directory import participant_directory
+from .images import schedule_variants, variants_ready
+from .models import (
+    AdvertisementsAtelier, Atelier, AtelierLoad, Client, Commandes, FabricStore, Message, Product,
+    ProductImage, SyncChange, UserInteraction,
+)
+
+PARTICIPANT_ROLES = {
+    Client: "client",
+    Atelier: "atelier",
+    FabricStore: "fabric_store",
+}
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Atelier)
+@receiver(post_save, sender=FabricStore)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Atelier)
+@receiver(post_delete, sender=FabricStore)
+def invalidate_participant_name(sender, instance, **kwargs):
+    """Drops the cached name when a participant is renamed or deleted"""
+    participant_directory.invalidate(PARTICIPANT_ROLES[sender], instance.user_id)
+
+
+@receiver(post_save, sender=Atelier)
+def sync_atelier_capacity(sender, instance, **kwargs):
+    """Keeps the dispatcher's copy of the atelier's capacity current"""
+    AtelierLoad.objects.update_or_create(atelier_id=instance.user_id, defaults={"capacity": instance.capacity or 0})
+
+
+@receiver(pre_save, sender=Commandes)
+@receiver(pre_delete, sender=Commandes)
+def read_stored_commande(sender, instance, **kwargs):
+    """
+    Reads the order as stored before it is overwritten or deleted. Read from the row
+    rather than remembered at load time, since queryset updates (assignment, refusals)
+    change orders behind loaded instances.
+    """
+    instance._stored_state = Commandes.stored_state(instance.pk)
+
+
+@receiver(post_save, sender=Commandes)
+@receiver(post_delete, sender=Commandes)
+def record_commande_change(sender, instance, signal, created=False, **kwargs):
+    """Updates atelier loads, daily rollups and the status event log from the saved or deleted order"""
+    previous = None if created else instance.__dict__.pop("_stored_state", None)
+    current = None if signal is post_delete else instance.tracked_state()
+    Commandes.record_change(instance.pk, previous, current)
+
+
+@receiver(post_delete, sender=Message)
+@receiver(post_delete, sender=UserInteraction)
+def log_sync_tombstone(sender, instance, **kwargs):
+    """Records deletions so delta sync clients can drop the row"""
+    kind = "message" if sender is Message else "interaction"
+    SyncChange.log([SyncChange.entry(kind, instance, op="delete")])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog(sender, instance, **kwargs):
+    """Product changes invalidate cached catalog responses of the product's owner and category"""
+    scopes = product_scopes(instance)
+    # After commit, so a concurrent listing cannot re-cache the old rows under the new version
+    transaction.on_commit(lambda: bump_catalog_versions(scopes))
+    instance._loaded_scope = (instance.owner, instance.category)
+
+
+@receiver(variants_ready, sender=Product)
+@receiver(variants_ready, sender=ProductImage)
+def invalidate_catalog_variants(sender, instance, **kwargs):
+    """Cached listings and ETags still point at the original image until the variants are ready"""
+    product = instance if sender is Product else instance.product
+    Product.objects.filter(pk=product.pk).update(updated_at=now())
+    bump_catalog_versions(product_scopes(product))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=AdvertisementsAtelier)
+def render_image_variants(sender, instance, **kwargs):
+    """Queues resized copies of newly attached images"""
+    schedule_variants(instance)
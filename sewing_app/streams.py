@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def participant_channel(role, user_id):
+    return f"{role}:{user_id}"
+
+
+def message_payload(message):
+    """Builds the JSON-serializable event body for a message"""
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "sender_role": message.sender_role,
+        "sender_name": message.sender_name,
+        "receiver_id": message.receiver_id,
+        "receiver_role": message.receiver_role,
+        "receiver_name": message.receiver_name,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat() if message.timestamp else None,
+    }
+
+
+class LocalBackend:
+    """Delivers events to subscribers of the current process only"""
+
+    def __init__(self, **options):
+        self._deliver = None
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, payload):
+        self._deliver(channel, payload)
+
+
+class UnixSocketBackend:
+    """
+    Shares events between worker processes on the same host.
+
+    Every process binds a Unix datagram socket inside ``path``; publishing sends
+    the event to every socket found there, so each worker fans it out to its own
+    subscribers. Sockets left behind by dead workers are removed on first failure.
+
+    Sends never block: an event for a worker whose socket buffer is full is dropped
+    and logged. Events larger than ``max_datagram`` bytes are sent as a reference
+    (``{"id": ..., "truncated": True}``) that the stream reads from the database.
+    """
+
+    def __init__(self, path=None, max_datagram=65536, **options):
+        self.path = path or os.path.join(tempfile.gettempdir(), "sewing_app_streams")
+        self.max_datagram = max_datagram
+        self._sock = None
+        self._sock_path = None
+
+    def start(self, deliver):
+        os.makedirs(self.path, exist_ok=True)
+        self._sock_path = os.path.join(self.path, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._sock_path)
+        thread = threading.Thread(target=self._listen, args=(deliver,), daemon=True, name="message-stream-listener")
+        thread.start()
+
+    def _listen(self, deliver):
+        while True:
+            data = self._sock.recv(self.max_datagram)
+            try:
+                channel, payload = json.loads(data)
+            except ValueError:
+                continue
+            deliver(channel, payload)
+
+    def encode(self, channel, payload):
+        data = json.dumps([channel, payload]).encode()
+        if len(data) > self.max_datagram:
+            data = json.dumps([channel, {"id": payload["id"], "truncated": True}]).encode()
+        return data
+
+    def publish(self, channel, payload):
+        data = self.encode(channel, payload)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            for entry in os.scandir(self.path):
+                if not entry.name.endswith(".sock"):
+                    continue
+                try:
+                    sender.sendto(data, socket.MSG_DONTWAIT, entry.path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The owning worker is gone
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+                except BlockingIOError:
+                    # The worker is not keeping up; its clients get the event when they reconnect and replay
+                    logger.warning("Dropped message event %s for %s: socket buffer full", payload.get("id"), entry.path)
+                except OSError as exc:
+                    logger.warning("Could not publish message event %s to %s: %s", payload.get("id"), entry.path, exc)
+
+
+class Subscription:
+    def __init__(self, channel, maxsize):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def push(self, payload):
+        # Runs on the event loop thread
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # The client is too slow; it will reconnect and replay from Last-Event-ID
+            self.lagged = True
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class MessageBroker:
+    """In-process pub/sub connecting message writes to open event streams"""
+
+    def __init__(self, backend, queue_size=100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.backend.start(self._deliver)
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, payload):
+        self.backend.publish(channel, payload)
+
+    def _deliver(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, payload)
+            except RuntimeError:
+                # The subscriber's event loop has been closed
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend_class = import_string(
+                    getattr(settings, "MESSAGE_STREAM_BACKEND", "sewing_app.streams.LocalBackend")
+                )
+                backend = backend_class(**getattr(settings, "MESSAGE_STREAM_OPTIONS", {}))
+                _broker = MessageBroker(backend, getattr(settings, "MESSAGE_STREAM_QUEUE_SIZE", 100))
+    return _broker
+
+
+def publish_messages(messages):
+    """Publishes new messages to both participants once the transaction commits"""
+    events = [
+        (channel, message_payload(message))
+        for message in messages
+        for channel in (
+            participant_channel(message.receiver_role, message.receiver_id),
+            participant_channel(message.sender_role, message.sender_id),
+        )
+    ]
+
+    def send():
+        broker = get_broker()
+        for channel, payload in events:
+            try:
+                broker.publish(channel, payload)
+            except Exception:
+                logger.exception("Failed to publish message event on %s", channel)
+
+    transaction.on_commit(send)
@@ -0,0 +1,81 @@
+import base64
+
+from django.db.models import Max, Q
+
+from .models import SyncChange
+
+TOKEN_VERSION = "v1"
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_token(seq):
+    return base64.urlsafe_b64encode(f"{TOKEN_VERSION}:{seq}".encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, seq = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        seq = int(seq)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidSyncToken("Malformed sync token")
+    if version != TOKEN_VERSION or seq < 0:
+        raise InvalidSyncToken("Unsupported sync token")
+    return seq
+
+
+def head_token(log=None):
+    """Token positioned after the latest change, for clients that just did a full download"""
+    log = SyncChange.objects.all() if log is None else log
+    return encode_token(log.aggregate(head=Max("pk"))["head"] or 0)
+
+
+def feed(log, since, limit=500):
+    """
+    Returns the entries of an append-only log (a queryset) after the ``since`` token.
+
+    Entries come in primary key order, at most ``limit`` of them.
+    Returns (entries, next_token, has_more).
+    """
+    after = decode_token(since)
+    entries = list(log.filter(pk__gt=after).order_by("pk")[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_seq = entries[-1].pk if entries else after
+    return entries, encode_token(next_seq), has_more
+
+
+def delta(kind, model, since, participant=None, limit=500):
+    """
+    Returns the rows of ``model`` created, changed or deleted after the ``since`` token.
+
+    Changes are read from the change log in sequence order (at most ``limit`` entries),
+    collapsed per object, and the surviving rows are fetched in a single query.
+    Returns (rows, deleted_ids, next_token, has_more).
+    """
+    after = decode_token(since)
+    changes = SyncChange.objects.filter(kind=kind, seq__gt=after)
+    if participant is not None:
+        user_id, user_role = participant
+        changes = changes.filter(
+            Q(sender_id=user_id, sender_role=user_role) | Q(receiver_id=user_id, receiver_role=user_role)
+        )
+    changes = list(changes.order_by("seq").values_list("seq", "object_id", "op")[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    latest_op = {}
+    for _, object_id, op in changes:
+        latest_op[object_id] = op
+    upserted = [object_id for object_id, op in latest_op.items() if op == "upsert"]
+    rows = list(model.objects.filter(pk__in=upserted).order_by("pk"))
+
+    # Rows changed and then deleted within the window are reported as deletions
+    found = {row.pk for row in rows}
+    deleted = sorted(object_id for object_id, op in latest_op.items() if op == "delete" or object_id not in found)
+
+    next_seq = changes[-1][0] if changes else after
+    return rows, deleted, encode_token(next_seq), has_more
@@ -0,0 +1,289 @@
+import datetime
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import now
+from PIL import Image
+
+from . import images
+from .catalog import catalog_versions
+from .streams import UnixSocketBackend
+from .models import (
+    Atelier, AtelierLoad, CommandeDailyRollup, CommandeEvent, Commandes, DemandeAtelier, Product, ProductImage,
+)
+
+SQLITE_IN_MEMORY = connection.vendor == "sqlite" and connection.is_in_memory_db()
+
+
+@unittest.skipIf(
+    SQLITE_IN_MEMORY, "threads share one in-memory SQLite database, which has table locks but no busy timeout"
+)
+class AssignmentStressTest(TransactionTestCase):
+    """Hundreds of ateliers bid on the same order at once; exactly one of them must win"""
+    bidders = 200
+
+    def setUp(self):
+        self.commande = Commandes.objects.create(
+            client=1, description="Robe", quantity=1, address="Alger",
+            deadline=now() + datetime.timedelta(days=7),
+        )
+
+    def run_concurrently(self, target):
+        start = threading.Barrier(self.bidders)
+        errors = []
+
+        def worker(atelier_id):
+            try:
+                start.wait()
+                target(atelier_id)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, self.bidders + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assert_single_winner(self):
+        self.commande.refresh_from_db()
+        accepted = DemandeAtelier.objects.filter(commande_id=self.commande.pk, status="accepted")
+        self.assertEqual(accepted.count(), 1)
+        self.assertEqual(self.commande.status, "validated")
+        self.assertEqual(self.commande.atelier, accepted.get().atelier_id)
+        self.assertFalse(DemandeAtelier.objects.filter(commande_id=self.commande.pk, status="pending").exists())
+        self.assertEqual(
+            DemandeAtelier.objects.filter(commande_id=self.commande.pk, status="rejected").count(),
+            self.bidders - 1,
+        )
+        self.assertEqual(
+            CommandeEvent.objects.filter(commande_id=self.commande.pk, to_status="validated").count(), 1
+        )
+
+    def test_concurrent_bids_each_claiming(self):
+        def bid_and_claim(atelier_id):
+            DemandeAtelier.objects.create(atelier_id=atelier_id, commande_id=self.commande.pk)
+            DemandeAtelier.assign_first_atelier(self.commande.pk)
+
+        self.run_concurrently(bid_and_claim)
+        self.assert_single_winner()
+
+    def test_concurrent_claims_pick_earliest_bid(self):
+        for atelier_id in range(1, self.bidders + 1):
+            DemandeAtelier.objects.create(atelier_id=atelier_id, commande_id=self.commande.pk)
+        winners = []
+        self.run_concurrently(lambda atelier_id: winners.append(DemandeAtelier.assign_first_atelier(self.commande.pk)))
+
+        self.assert_single_winner()
+        winners = [winner for winner in winners if winner is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(winners[0].atelier_id, 1)
+
+    def test_refusal_reopens_order(self):
+        for atelier_id in (1, 2):
+            DemandeAtelier.objects.create(atelier_id=atelier_id, commande_id=self.commande.pk)
+        DemandeAtelier.assign_first_atelier(self.commande.pk)
+
+        self.assertFalse(DemandeAtelier.reset_commande_on_refusal(self.commande.pk, atelier_id=2))
+        self.assertTrue(DemandeAtelier.reset_commande_on_refusal(self.commande.pk, atelier_id=1))
+        self.commande.refresh_from_db()
+        self.assertIsNone(self.commande.atelier)
+        self.assertEqual(self.commande.status, "pending")
+        self.assertFalse(DemandeAtelier.objects.filter(commande_id=self.commande.pk).exists())
+
+
+class CommandeBookkeepingTest(TestCase):
+    """Atelier loads and daily rollups follow orders changed through instances and queryset updates alike"""
+
+    def setUp(self):
+        for atelier_id in (1, 2):
+            Atelier.objects.create(
+                user_id=atelier_id, name=f"Atelier {atelier_id}", email=f"atelier{atelier_id}@example.com",
+                password="x", role="atelier", capacity=10,
+            )
+        self.commande = Commandes.objects.create(
+            client=1, description="Robe", quantity=3, price=5, address="Alger",
+            deadline=now() + datetime.timedelta(days=7),
+        )
+        for atelier_id in (2, 1):
+            DemandeAtelier.objects.create(atelier_id=atelier_id, commande_id=self.commande.pk)
+        DemandeAtelier.assign_first_atelier(self.commande.pk)
+
+    def assert_matches_rebuild(self):
+        def snapshot():
+            loads = set(AtelierLoad.objects.values_list("atelier_id", "open_quantity", "open_orders"))
+            rollups = set(
+                CommandeDailyRollup.objects.exclude(orders=0)
+                .values_list("atelier", "day", "status", "orders", "quantity", "revenue")
+            )
+            return loads, rollups
+
+        maintained = snapshot()
+        AtelierLoad.rebuild()
+        CommandeDailyRollup.rebuild()
+        self.assertEqual(maintained, snapshot())
+
+    def test_save_after_assignment(self):
+        self.commande.refresh_from_db()
+        self.assertEqual(self.commande.atelier, 2)
+        self.commande.quantity = 4
+        self.commande.save()
+        self.assert_matches_rebuild()
+        self.assertEqual(AtelierLoad.objects.get(atelier_id=2).open_quantity, 4)
+
+    def test_delete_after_refusal(self):
+        commande = Commandes.objects.get(pk=self.commande.pk)
+        self.assertTrue(DemandeAtelier.reset_commande_on_refusal(commande.pk, atelier_id=2))
+        commande.refresh_from_db()
+        commande.delete()
+        self.assert_matches_rebuild()
+        self.assertFalse(CommandeDailyRollup.objects.filter(orders__lt=0).exists())
+
+    def test_refuse_requires_assigned_atelier(self):
+        url = f"/api/commandes/{self.commande.pk}/refuse/"
+        self.assertEqual(self.client.post(url, {}, content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post(url, {"atelier_id": 1}, content_type="application/json").status_code, 409)
+        self.assertEqual(Commandes.objects.get(pk=self.commande.pk).atelier, 2)
+        self.assertEqual(self.client.post(url, {"atelier_id": 2}, content_type="application/json").status_code, 200)
+        self.assert_matches_rebuild()
+
+    def test_save_of_copy_loaded_before_refusal(self):
+        stale = Commandes.objects.get(pk=self.commande.pk)
+        self.assertTrue(DemandeAtelier.reset_commande_on_refusal(stale.pk, atelier_id=2))
+        stale.save()
+        self.assert_matches_rebuild()
+
+
+class CatalogCacheTest(TestCase):
+    """Cached catalog responses are invalidated once product changes are visible"""
+
+    def test_versions_bumped_on_commit(self):
+        before = catalog_versions([None, ("category", "dress")])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Product.objects.create(name="Robe", owner=1, category="dress", price=1000)
+            self.assertEqual(catalog_versions([None, ("category", "dress")]), before)
+        self.assertTrue(callbacks)
+        after = catalog_versions([None, ("category", "dress")])
+        self.assertTrue(all(new > old for new, old in zip(after, before)))
+
+    def test_cache_stats_staff_only(self):
+        self.assertIn(self.client.get("/api/products/cache-stats/").status_code, (401, 403))
+
+
+class UnixSocketBackendTest(SimpleTestCase):
+    """Publishing to worker sockets never blocks the request that commits the message"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+        self.backend = UnixSocketBackend(path=self.path, max_datagram=1024)
+        # A worker that never reads its socket
+        self.worker = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(self.worker.close)
+        self.worker.bind(f"{self.path}/stalled.sock")
+
+    def test_full_socket_does_not_block(self):
+        payload = {"id": 1, "content": "x" * 900}
+        started = time.monotonic()
+        with self.assertLogs("sewing_app.streams", "WARNING") as logs:
+            for _ in range(2000):
+                self.backend.publish("client:1", payload)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIn("socket buffer full", logs.output[0])
+
+    def test_large_payload_sent_as_reference(self):
+        self.backend.publish("client:1", {"id": 7, "content": "x" * 4096})
+        self.assertEqual(json.loads(self.worker.recv(1024)), ["client:1", {"id": 7, "truncated": True}])
+
+
+@unittest.skipIf(
+    SQLITE_IN_MEMORY, "threads share one in-memory SQLite database, which has table locks but no busy timeout"
+)
+class ImageVariantTest(TransactionTestCase):
+    """Variants are rendered by the worker pool while requests keep writing to the same tables"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_URL="/media/")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def stored_image(self, name, width=800):
+        buffer = BytesIO()
+        Image.new("RGB", (width, width // 2), "teal").save(buffer, "PNG")
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def wait_for_manifests(self, queryset, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not queryset.filter(image_variants={}).exists():
+                return
+            time.sleep(0.1)
+        self.fail(f"{queryset.filter(image_variants={}).count()} image(s) never got their variants")
+
+    def test_uploads_while_variants_render(self):
+        # Every add_image queues a render whose manifest write races the next request's writes
+        names = [self.stored_image(f"products/source_{i}.png") for i in range(4)]
+        for i in range(40):
+            product = Product.objects.create(name=f"Robe {i}", owner=1, category="femme", price=1000)
+            product.add_image(names[i % len(names)])
+
+        gallery = ProductImage.objects.all()
+        self.wait_for_manifests(gallery)
+        for image in gallery:
+            self.assertEqual(set(image.image_variants[image.path]), {"320", "640"})
+
+    def test_manifest_write_merges_and_prunes(self):
+        name = self.stored_image("products/merge.png")
+        product = Product.objects.create(name="Robe", owner=1, category="femme", price=1000)
+        image = ProductImage.objects.create(product=product, path=name)
+        self.wait_for_manifests(ProductImage.objects.filter(pk=image.pk))
+        ProductImage.objects.filter(pk=image.pk).update(
+            image_variants={name: {}, "products/removed.png": {"320": {"webp": "gone.webp"}}}
+        )
+
+        images._process(ProductImage, image.pk, [name])
+
+        image.refresh_from_db()
+        self.assertEqual(list(image.image_variants), [name])
+        self.assertEqual(image.image_variants[name]["320"]["webp"], images.variant_name(name, 320, "webp"))
+        self.assertTrue(default_storage.exists(image.image_variants[name]["640"]["jpeg"]))
+        # A job for a row deleted in the meantime is a no-op
+        ProductImage.objects.filter(pk=image.pk).delete()
+        images._process(ProductImage, image.pk, [name])
+
+    def test_failed_manifest_write_is_requeued(self):
+        name = self.stored_image("products/locked.png")
+        product = Product.objects.create(name="Robe", owner=1, category="femme", price=1000)
+        image = ProductImage.objects.create(product=product, path=name)
+        self.wait_for_manifests(ProductImage.objects.filter(pk=image.pk))
+        ProductImage.objects.filter(pk=image.pk).update(image_variants={})
+
+        write_manifest = images._write_manifest
+        calls = []
+
+        def locked_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return write_manifest(*args)
+
+        with mock.patch.object(images, "_write_manifest", locked_once), mock.patch.object(images, "RETRY_DELAY", 0):
+            images._process(ProductImage, image.pk, [name])
+            self.wait_for_manifests(ProductImage.objects.filter(pk=image.pk))
+        self.assertEqual(len(calls), 2)
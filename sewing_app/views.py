@@ -1,13 +1,15 @@
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from django.http import JsonResponse
 from django.db import models
 from .models import (
-    Client, Atelier, FabricStore, Commandes, DemandeAtelier,
+    Client, Atelier, AtelierLoad, FabricStore, Commandes, CommandeDailyRollup, CommandeEvent, DemandeAtelier,
     CommandeAtelierFabricStore, DemandeFabricStore, Product, AdvertisementsAtelier,
-Message,UserInteraction
+Message,UserInteraction,ConversationSummary,conversation_key
 )
             # Generate token
 import datetime
@@ -16,21 +18,41 @@ from django.db.models import Q
 from .serializers import (
     ClientSerializer, AtelierSerializer, FabricStoreSerializer, CommandeSerializer,
     DemandeAtelierSerializer, CommandeAtelierFabricStoreSerializer, DemandeFabricStoreSerializer, MessageListSerializer,
-    ProductSerializer, AdvertisementsAtelierSerializer, MessageSerializer,UserInteractionSerializer
+    ProductSerializer, ProductListSerializer, AdvertisementsAtelierSerializer, MessageSerializer,UserInteractionSerializer,
+    ConversationSummarySerializer, AtelierSuggestionQuerySerializer, AtelierSuggestionSerializer,
+    CommandeEventSerializer, CommandeListQuerySerializer, CommandeStatsQuerySerializer, CommandeStatsSerializer
 )
-from .pagination import CustomPagination 
+from .pagination import CustomPagination, KeysetPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, action
+from rest_framework.exceptions import ValidationError
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authentication import TokenAuthentication
 from django.contrib.auth.hashers import check_password
 from rest_framework.parsers import JSONParser
 import logging
+import asyncio
+import hashlib
+import io
+import json
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .utils import create_response
+from .streams import get_broker, message_payload, participant_channel
+from . import product_io
+from .catalog import cache_stats, cached_product_facets, catalog_cache_key, record_cache_lookup
+from .search import MESSAGE_FTS, PRODUCT_FTS, fts_available, fts_search
+from .sync import InvalidSyncToken, delta, feed, head_token
+
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_REPLAY_LIMIT = 500
 
 from rest_framework.authentication import TokenAuthentication
 
@@ -153,6 +175,109 @@ class AdvertisementsAtelierCreateView(APIView):
         )
 
 # =============== View List APIs ===============
+class ConditionalResponse(Exception):
+    """Carries the 304/412 response of a conditional GET out of ``initial()``"""
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to list and retrieve, and answers 304 Not Modified
+    when the client's copy is still current.
+
+    A detail response is versioned by its row's ``modified_field``, a list page by the
+    primary keys and timestamps of its rows plus the total count. Requests carrying
+    If-None-Match / If-Modified-Since get their validators from a values query before
+    anything is loaded or serialized; other requests derive them from the rows the
+    response is built from, at no extra cost. Lists only carry an ETag, since removing
+    a row or re-sorting a page does not move the remaining rows' timestamps.
+    """
+    modified_field = 'updated_at'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ('GET', 'HEAD') or self.action not in ('list', 'retrieve'):
+            return
+        if 'HTTP_IF_NONE_MATCH' not in request.META and 'HTTP_IF_MODIFIED_SINCE' not in request.META:
+            return
+        self.validators = self.list_validators() if self.action == 'list' else self.detail_validators()
+        if self.validators is None:
+            return
+        etag, last_modified = self.validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+        )
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.action == 'retrieve' and self.validators is None:
+            self.validators = self.object_validators(obj.pk, getattr(obj, self.modified_field))
+        return obj
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.action == 'list' and self.validators is None:
+            rows = [(obj.pk, getattr(obj, self.modified_field)) for obj in page]
+            self.validators = self.page_validators(self.paginator.page.paginator.count, rows)
+        return page
+
+    def object_validators(self, pk, modified):
+        return f'W/"{pk}.{int(modified.timestamp() * 1000000)}"', modified
+
+    def page_validators(self, count, rows):
+        digest = hashlib.md5(str(count).encode())
+        for pk, modified in rows:
+            digest.update(f"|{pk}.{modified.timestamp()}".encode())
+        return f'W/"{digest.hexdigest()}"', None
+
+    def detail_validators(self):
+        """Validators of the requested object, or None if it does not exist"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            row = (
+                self.filter_queryset(self.get_queryset()).filter(**lookup)
+                .values_list('pk', self.modified_field).first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            return None  # Malformed ids get their 404 from retrieve()
+        return self.object_validators(*row) if row is not None else None
+
+    def list_validators(self):
+        """Validators of the requested page, or None when the page is not a plain page number"""
+        if self.paginator is None or not self.paginator.get_page_size(self.request):
+            return None
+        size = self.paginator.get_page_size(self.request)
+        try:
+            number = int(self.request.query_params.get(self.paginator.page_query_param, 1))
+        except ValueError:
+            return None
+        if number < 1:
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list('pk', self.modified_field)[(number - 1) * size:number * size]
+        return self.page_validators(queryset.count(), rows)
+
+
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
@@ -226,8 +351,8 @@ class ClientViewSet(viewsets.ModelViewSet):
             status_code=status.HTTP_204_NO_CONTENT
         )
     
-class AtelierViewSet(viewsets.ModelViewSet):
-    queryset = Atelier.objects.all()
+class AtelierViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Atelier.objects.order_by('user_id')
     serializer_class = AtelierSerializer
     permission_classes = [AllowAny]
     pagination_class = CustomPagination
@@ -239,7 +364,7 @@ class AtelierViewSet(viewsets.ModelViewSet):
         # Filter by atelier_id if provided in query parameters
         atelier_id = self.request.query_params.get('atelier_id', None)
         if atelier_id:
-            queryset = queryset.filter(user_id=atelier_id).only('user_id', 'store_name', 'phone', 'address',)
+            queryset = queryset.filter(user_id=atelier_id).only('user_id', 'store_name', 'phone', 'address', 'updated_at')
 
         # Filter by name if provided
         name = self.request.query_params.get('name', None)
@@ -280,6 +405,23 @@ class AtelierViewSet(viewsets.ModelViewSet):
             status_code=status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=['get'])
+    def suggested(self, request):
+        """Ateliers that can take an order of ?quantity=N due by ?deadline=<ISO datetime>, best first"""
+        query = AtelierSuggestionQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return create_response(
+                message="Invalid order parameters",
+                errors=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        suggestions = AtelierLoad.suggest(**query.validated_data)
+        return create_response(
+            data=AtelierSuggestionSerializer(suggestions, many=True).data,
+            message="Suggested workshops retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
 class FabricStoreViewSet(viewsets.ModelViewSet):
     queryset = FabricStore.objects.all().order_by('user_id')
     serializer_class = FabricStoreSerializer
@@ -416,12 +558,53 @@ def delete_fabric_store(request, fabric_store_id):
         'error_code': 'METHOD_NOT_ALLOWED'
     }, status=405)
 
-class CommandeViewSet(viewsets.ModelViewSet):
+class CommandeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Commandes.objects.all()
     serializer_class = CommandeSerializer
     permission_classes = [AllowAny]
     pagination_class = CustomPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+
+        query = self.list_query()
+        if query.errors:
+            # list() answers invalid filters with a 400 before reading any rows
+            return queryset.none()
+        filters = query.validated_data
+
+        # Each filter, alone or with the others, is backed by an index (see Commandes.Meta)
+        if 'user' in filters:
+            queryset = queryset.filter(client=filters['user'])
+        if 'atelier' in filters:
+            queryset = queryset.filter(atelier=filters['atelier'])
+        if 'status' in filters:
+            queryset = queryset.filter(status=filters['status'])
+        if 'deadline_after' in filters:
+            queryset = queryset.filter(deadline__gte=filters['deadline_after'])
+        if 'deadline_before' in filters:
+            queryset = queryset.filter(deadline__lte=filters['deadline_before'])
+
+        if filters['sort'] == 'deadline':
+            return queryset.order_by('deadline', 'id_commande')
+        return queryset.order_by('-id_commande')
+
+    def list_query(self):
+        """The list filters, validated once per request (see CommandeListQuerySerializer)"""
+        if not hasattr(self, '_list_query'):
+            # Empty parameters are ignored, as before
+            params = {key: value for key, value in self.request.query_params.items() if value != ''}
+            self._list_query = CommandeListQuerySerializer(data=params)
+            self._list_query.is_valid()
+        return self._list_query
+
+    def list_validators(self):
+        if self.list_query().errors:
+            return None
+        return super().list_validators()
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
@@ -479,13 +662,14 @@ class CommandeViewSet(viewsets.ModelViewSet):
         )
     
     def list(self, request, *args, **kwargs):
-        # Get queryset and apply initial ordering
-        queryset = self.filter_queryset(self.get_queryset().order_by('-id_commande'))
-        
-        # Filter by client_id if provided in query parameters
-        user_id = request.query_params.get('user', None)
-        if user_id:
-            queryset = queryset.filter(client=user_id)
+        query = self.list_query()
+        if query.errors:
+            return create_response(
+                message="Invalid command filters",
+                errors=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
             
         # Apply pagination
         page = self.paginate_queryset(queryset)
@@ -539,6 +723,131 @@ class CommandeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def events(self, request):
+        """Status transitions after ?since=<token>, optionally for one ?atelier= or ?client="""
+        log = CommandeEvent.objects.all()
+        for param in ('atelier', 'client'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                return create_response(
+                    message=f"Invalid {param} ID",
+                    errors={param: "Must be an integer"},
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            log = log.filter(**{param: value})
+
+        since = request.query_params.get('since', '')
+        if not since:
+            # No token yet: start from the current head after listing the orders
+            return create_response(
+                data={"results": [], "next_token": head_token(CommandeEvent.objects.all()), "has_more": False},
+                message="Event token issued successfully",
+                status_code=status.HTTP_200_OK
+            )
+        try:
+            events, next_token, has_more = feed(log, since)
+        except InvalidSyncToken as e:
+            return create_response(
+                message="Invalid event token",
+                errors={"since": str(e)},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return create_response(
+            data={
+                "results": CommandeEventSerializer(events, many=True).data,
+                "next_token": next_token,
+                "has_more": has_more,
+            },
+            message="Command events retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Orders, quantity and revenue per day and status, for one ?atelier= or all; reads only the rollups"""
+        params = {key: value for key, value in request.query_params.items() if value != ''}
+        query = CommandeStatsQuerySerializer(data=params)
+        if not query.is_valid():
+            return create_response(
+                message="Invalid statistics parameters",
+                errors=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        filters = query.validated_data
+
+        rollups = CommandeDailyRollup.objects.filter(orders__gt=0)
+        if 'atelier' in filters:
+            rollups = rollups.filter(atelier=filters['atelier'])
+        if 'date_from' in filters:
+            rollups = rollups.filter(day__gte=filters['date_from'])
+        if 'date_to' in filters:
+            rollups = rollups.filter(day__lte=filters['date_to'])
+        days = list(
+            rollups.values('day', 'status')
+            .annotate(orders=models.Sum('orders'), quantity=models.Sum('quantity'), revenue=models.Sum('revenue'))
+            .order_by('day', 'status')
+        )
+
+        totals = {}
+        for row in days:
+            total = totals.setdefault(row['status'], {'status': row['status'], 'orders': 0, 'quantity': 0, 'revenue': 0})
+            for field in ('orders', 'quantity', 'revenue'):
+                total[field] += row[field]
+        return create_response(
+            data={
+                "days": CommandeStatsSerializer(days, many=True).data,
+                "totals": CommandeStatsSerializer(totals.values(), many=True).data,
+            },
+            message="Command statistics retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['post'])
+    def assign(self, request, pk=None):
+        """Assigns the order to the atelier whose pending request came first"""
+        demande = DemandeAtelier.assign_first_atelier(self.get_object().pk)
+        if demande is None:
+            return create_response(
+                message="Command is not open for assignment or has no pending request",
+                errors={"detail": "No atelier could be assigned"},
+                status_code=status.HTTP_409_CONFLICT
+            )
+        return create_response(
+            data=DemandeAtelierSerializer(demande).data,
+            message="Command assigned successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['post'])
+    def refuse(self, request, pk=None):
+        """Reopens the order when the assigned atelier refuses it; body: {atelier_id} (required)"""
+        atelier_id = request.data.get('atelier_id')
+        if atelier_id in (None, ''):
+            return create_response(
+                message="Atelier ID is required",
+                errors={"atelier_id": "Only the assigned atelier can refuse the command"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if not str(atelier_id).isdigit():
+            return create_response(
+                message="Invalid atelier ID",
+                errors={"atelier_id": "Must be an integer"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if not DemandeAtelier.reset_commande_on_refusal(self.get_object().pk, atelier_id=atelier_id):
+            return create_response(
+                message="Command is not assigned to this atelier",
+                errors={"detail": "Nothing to refuse"},
+                status_code=status.HTTP_409_CONFLICT
+            )
+        return create_response(
+            message="Command reopened successfully",
+            status_code=status.HTTP_200_OK
+        )
+
 class DemandeAtelierViewSet(viewsets.ModelViewSet):
     queryset = DemandeAtelier.objects.all()
     serializer_class = DemandeAtelierSerializer
@@ -624,23 +933,39 @@ class DemandeFabricStoreViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
     pagination_class = CustomPagination
     parser_classes = [JSONParser, MultiPartParser, FormParser]
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ProductListSerializer
+        return ProductSerializer
+
+    def get_permissions(self):
+        if self.action in ('import_products', 'export_products'):
+            return [IsAuthenticated()]
+        if self.action == 'cache_statistics':
+            return [IsAdminUser()]
+        return super().get_permissions()
+
     def get_queryset(self):
-        queryset = Product.objects.only('product_id', 'name', 'price', 'category', 'disponible', 'promo','image','rating','promo_price',)
+        queryset = Product.objects.all()
+        if self.action == 'list':
+            # Load exactly the columns the list serializer reads, and the page's galleries in one query
+            queryset = queryset.only(*ProductListSerializer.projection).prefetch_related('product_images')
         
         # Filter by category
         category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
-                # Filter by category
+                
+        # Filter by product
         product_specific = self.request.query_params.get('product_id', None)
-        if category:
+        if product_specific:
             queryset = queryset.filter(product_id=product_specific)
                
         # Filter by owner
@@ -668,6 +993,16 @@ class ProductViewSet(viewsets.ModelViewSet):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
             
+        # Full-text search, ranked by relevance unless a sort is requested
+        text = self.request.query_params.get('q', '').strip()
+        if text:
+            if fts_available():
+                queryset = fts_search(queryset, PRODUCT_FTS, text)
+            else:
+                queryset = queryset.filter(
+                    Q(name__icontains=text) | Q(description__icontains=text) | Q(category__icontains=text)
+                )
+            
         # Sort by price, rating, or newest
         sort_by = self.request.query_params.get('sort', None)
         if sort_by:
@@ -714,6 +1049,105 @@ class ProductViewSet(viewsets.ModelViewSet):
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
+    def list_cache_key(self):
+        if not hasattr(self, '_list_cache_key'):
+            self._list_cache_key = catalog_cache_key(
+                'list', self.request.query_params, vary=self.request.build_absolute_uri('/')
+            )
+        return self._list_cache_key
+
+    def list_validators(self):
+        # A cached page carries the validators it was rendered with; both go stale together
+        cached = cache.get(self.list_cache_key())
+        if cached is not None:
+            return cached['validators']
+        return super().list_validators()
+
+    def list(self, request, *args, **kwargs):
+        # Listings are cached per normalized query; product changes bump the version in the key
+        key = self.list_cache_key()
+        cached = cache.get(key)
+        record_cache_lookup(cached is not None)
+        if cached is not None:
+            self.validators = cached['validators']
+            return Response(cached['data'])
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key, {'data': response.data, 'validators': self.validators},
+                getattr(settings, 'PRODUCT_LIST_CACHE_TIMEOUT', 60)
+            )
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_products(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return create_response(
+                message="File is required",
+                errors={"file": "Upload a JSONL or CSV file"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        fmt = request.data.get('format') or product_io.guess_format(upload.name)
+        if fmt not in product_io.FORMATS:
+            return create_response(
+                message="Unsupported format",
+                errors={"format": f"Must be one of {', '.join(product_io.FORMATS)}"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Large uploads are spooled to disk by Django; rows are parsed from the file one by one
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        result = product_io.import_products(product_io.iter_rows(stream, fmt))
+        if result['encoding_error']:
+            # Chunks read before the undecodable data are already committed
+            return create_response(
+                data=result,
+                message=f"File must be UTF-8 encoded; imported {result['created']} products before the invalid data",
+                errors={"file": result['encoding_error']},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return create_response(
+            data=result,
+            message=f"Imported {result['created']} products, rejected {result['failed']} rows",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_products(self, request):
+        fmt = request.query_params.get('export_format', 'jsonl')
+        if fmt not in product_io.FORMATS:
+            return create_response(
+                message="Unsupported format",
+                errors={"export_format": f"Must be one of {', '.join(product_io.FORMATS)}"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        response = StreamingHttpResponse(
+            product_io.export_products(self.get_queryset(), fmt),
+            content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{fmt}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_statistics(self, request):
+        """Hit/miss counters of the product listing and facets caches (staff only)"""
+        return create_response(
+            data=cache_stats(),
+            message="Product cache statistics retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Counts per category, promo flag and price bucket for the current filters"""
+        facets = cached_product_facets(self.get_queryset(), request.query_params)
+        return create_response(
+            data=facets,
+            message="Product facets retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=['post'], url_path='apply-promo')
     def apply_promo(self, request, pk=None):
         product = self.get_object()
@@ -821,7 +1255,8 @@ class ProductViewSet(viewsets.ModelViewSet):
                 data={
                     "id": product_image.id,
                     "is_primary": product_image.is_primary,
-                    "image_url": request.build_absolute_uri(product_image.image.url)
+                    "position": product_image.position,
+                    "image_url": request.build_absolute_uri(product_image.url)
                 },
                 message="Image added successfully",
                 status_code=status.HTTP_201_CREATED
@@ -845,7 +1280,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        success = product.set_primary_image(image_id)
+        success = str(image_id).isdigit() and product.set_primary_image(int(image_id))
         if success:
             serializer = self.get_serializer(product)
             return create_response(
@@ -871,7 +1306,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        success = product.remove_image(image_id)
+        success = str(image_id).isdigit() and product.remove_image(int(image_id))
         if success:
             serializer = self.get_serializer(product)
             return create_response(
@@ -886,6 +1321,19 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_404_NOT_FOUND
             )
 
+    @action(detail=True, methods=['get'], url_path='images')
+    def get_images(self, request, pk=None):
+        product = self.get_object()
+        images = [
+            dict(image.as_dict(), path=request.build_absolute_uri(image.url) if image.url else None)
+            for image in product.get_image_list()
+        ]
+        return create_response(
+            data=images,
+            message="Images retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
 @csrf_exempt
 def delete_product(request, product_id):
     if request.method == "DELETE":
@@ -904,50 +1352,110 @@ class AdvertisementsAtelierViewSet(viewsets.ModelViewSet):
     pagination_class = CustomPagination
 
 # =============== Messaging APIs ===============
-class MessageViewSet(viewsets.ModelViewSet):
+class DeltaSyncMixin:
+    """Adds a ``?since=<token>`` delta sync mode to list(), scoped by ?user_id=X&user_role=Y"""
+    sync_kind = None
+    sync_serializer_class = None
+
+    def get_participant(self, prefix='user'):
+        """Reads <prefix>_id / <prefix>_role from the query string, or None if incomplete"""
+        params = self.request.query_params
+        participant_id = params.get(f'{prefix}_id')
+        participant_role = params.get(f'{prefix}_role')
+        if not participant_id or not participant_role:
+            return None
+        try:
+            return int(participant_id), participant_role
+        except ValueError:
+            return None
+
+    def sync_list(self, request):
+        since = request.query_params.get('since', '')
+        if not since:
+            # No token yet: start from the current head after a full download
+            return create_response(
+                data={"results": [], "deleted": [], "next_token": head_token(), "has_more": False},
+                message="Sync token issued successfully",
+                status_code=status.HTTP_200_OK
+            )
+        try:
+            rows, deleted, next_token, has_more = delta(
+                self.sync_kind, self.queryset.model, since, participant=self.get_participant()
+            )
+        except InvalidSyncToken as e:
+            return create_response(
+                message="Invalid sync token",
+                errors={"since": str(e)},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return create_response(
+            data={
+                "results": self.sync_serializer_class(rows, many=True).data,
+                "deleted": deleted,
+                "next_token": next_token,
+                "has_more": has_more,
+            },
+            message="Changes retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+class MessageViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
     permission_classes = [AllowAny]
     pagination_class = CustomPagination
+    max_bulk_messages = 500
+    sync_kind = 'message'
+    sync_serializer_class = MessageSerializer
 
     def get_serializer_class(self):
         if self.action == 'list':
             return MessageListSerializer
         return MessageSerializer
 
-    def get_queryset(self):
-        # Start with base queryset
-        queryset = Message.objects.all()
-        
+    def get_conversation_filter(self):
+        """Returns the filter dict selecting the requested messages"""
         # Get query parameters for the conversation participants
         params = self.request.query_params
-        
+
         # If conversation parameters are provided, get messages in both directions
         if (user1_id := params.get('sender_id')) and (user1_role := params.get('sender_role')) and \
            (user2_id := params.get('receiver_id')) and (user2_role := params.get('receiver_role')):
-            
-            # Create an efficient OR query using Q objects
-            queryset = queryset.filter(
-                Q(sender_id=user1_id, sender_role=user1_role, receiver_id=user2_id, receiver_role=user2_role) | 
-                Q(sender_id=user2_id, sender_role=user2_role, receiver_id=user1_id, receiver_role=user1_role)
-            )
-        else:
-            # Build filter dictionary dynamically only for provided parameters
-            filters = {}
-            for param, field in [
-                ('sender_id', 'sender_id'),
-                ('sender_role', 'sender_role'),
-                ('receiver_id', 'receiver_id'),
-                ('receiver_role', 'receiver_role')
-            ]:
-                if value := params.get(param):
-                    filters[field] = value
-            
-            if filters:
-                queryset = queryset.filter(**filters)
-        
+            try:
+                # Both directions share one conversation key, served by a single index range
+                return {'conversation_key': conversation_key(user1_id, user1_role, user2_id, user2_role)}
+            except ValueError:
+                raise ValidationError({"detail": "sender_id and receiver_id must be integers"})
+
+        # Build filter dictionary dynamically only for provided parameters
+        filters = {}
+        for param, field in [
+            ('sender_id', 'sender_id'),
+            ('sender_role', 'sender_role'),
+            ('receiver_id', 'receiver_id'),
+            ('receiver_role', 'receiver_role')
+        ]:
+            if value := params.get(param):
+                filters[field] = value
+        return filters
+
+    def get_queryset(self):
         # Return ordered queryset, limiting to latest messages first
-        return queryset.order_by('-timestamp')
+        return Message.objects.filter(**self.get_conversation_filter()).order_by('-timestamp')
+
+    def list(self, request, *args, **kwargs):
+        # Delta sync mode: ?since=<token> returns only what changed
+        if 'since' in request.query_params:
+            return self.sync_list(request)
+
+        # Cursor mode: ?before=<id> / ?after=<id> seeks through the conversation index
+        paginator = KeysetPagination()
+        if not paginator.is_requested(request):
+            return super().list(request, *args, **kwargs)
+
+        page = paginator.paginate_queryset(Message.objects.filter(**self.get_conversation_filter()), request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -964,27 +1472,263 @@ class MessageViewSet(viewsets.ModelViewSet):
             status_code=status.HTTP_400_BAD_REQUEST
         )
 
-class UserInteractionViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='conversations')
+    def conversations(self, request):
+        participant = self.get_participant()
+        if participant is None:
+            return create_response(
+                message="user_id and user_role are required",
+                errors={"fields": "user_id and user_role query parameters are required"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Inbox rows are pre-aggregated, newest conversation first
+        queryset = ConversationSummary.objects.filter(
+            owner_id=participant[0], owner_role=participant[1]
+        ).order_by('-last_message_time')
+        page = self.paginate_queryset(queryset)
+        serializer = ConversationSummarySerializer(page, many=True)
+        return create_response(
+            data=self.get_paginated_response(serializer.data).data,
+            message="Conversations retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        participant = self.get_participant()
+        if participant is None:
+            return create_response(
+                message="user_id and user_role are required",
+                errors={"fields": "user_id and user_role query parameters are required"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = ConversationSummary.objects.filter(owner_id=participant[0], owner_role=participant[1])
+        # Optionally narrow down to a single conversation
+        peer = self.get_participant('peer')
+        if peer is not None:
+            queryset = queryset.filter(peer_id=peer[0], peer_role=peer[1])
+        total = queryset.aggregate(total=models.Sum('unread_count'))['total'] or 0
+
+        return create_response(
+            data={"user_id": participant[0], "user_role": participant[1], "unread_count": total},
+            message="Unread count retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        participant = self.get_participant()
+        text = request.query_params.get('q', '').strip()
+        if participant is None or not text:
+            return create_response(
+                message="q, user_id and user_role are required",
+                errors={"fields": "q, user_id and user_role query parameters are required"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Only the requesting participant's conversations are searched
+        user_id, user_role = participant
+        queryset = Message.objects.filter(
+            Q(sender_id=user_id, sender_role=user_role) | Q(receiver_id=user_id, receiver_role=user_role)
+        )
+        peer = self.get_participant('peer')
+        if peer is not None:
+            queryset = queryset.filter(
+                Q(sender_id=peer[0], sender_role=peer[1]) | Q(receiver_id=peer[0], receiver_role=peer[1])
+            )
+
+        if fts_available():
+            queryset = fts_search(queryset, MESSAGE_FTS, text)
+        else:
+            queryset = queryset.filter(content__icontains=text).order_by('-timestamp')
+
+        page = self.paginate_queryset(queryset)
+        serializer = MessageSerializer(page, many=True)
+        return create_response(
+            data=self.get_paginated_response(serializer.data).data,
+            message="Messages retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        fields = ('user_id', 'user_role', 'peer_id', 'peer_role')
+        if not all(request.data.get(field) for field in fields):
+            return create_response(
+                message="Missing required fields",
+                errors={"fields": "user_id, user_role, peer_id and peer_role are required"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            user_id = int(request.data['user_id'])
+            peer_id = int(request.data['peer_id'])
+            up_to = request.data.get('up_to')
+            up_to = int(up_to) if up_to not in (None, '') else None
+        except (TypeError, ValueError):
+            return create_response(
+                message="Invalid identifiers",
+                errors={"fields": "user_id, peer_id and up_to must be integers"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # One UPDATE covers any number of messages
+        updated = ConversationSummary.mark_read(
+            user_id, request.data['user_role'], peer_id, request.data['peer_role'], up_to=up_to
+        )
+        return create_response(
+            data={"marked": bool(updated), "up_to": up_to},
+            message="Messages marked as read" if updated else "Messages were already read",
+            status_code=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_send(self, request):
+        # Accept either a bare list or {"messages": [...]}
+        items = request.data.get('messages') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return create_response(
+                message="A non-empty list of messages is required",
+                errors={"messages": "Expected a list of message objects"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.max_bulk_messages:
+            return create_response(
+                message="Too many messages in one request",
+                errors={"messages": f"At most {self.max_bulk_messages} messages are allowed per request"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate every item in one pass, keeping per-item errors
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = MessageSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, Message(**serializer.validated_data)))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+
+        created = Message.bulk_send([message for _, message in valid]) if valid else []
+        for (index, _), message in zip(valid, created):
+            results[index] = {"index": index, "status": "created", "data": MessageSerializer(message).data}
+
+        return create_response(
+            data=results,
+            message=f"{len(created)} of {len(items)} messages sent successfully",
+            status_code=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+async def message_stream(request):
+    """
+    Server-sent events stream of new messages for one participant.
+
+    GET /api/messages/stream/?user_id=X&user_role=Y
+    Must be served through the ASGI application. Clients resume after a
+    disconnect with the Last-Event-ID header (or ?after=<id>); anything missed
+    is replayed from the database before live events.
+    """
+    if request.method != "GET":
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Method {request.method} not allowed. Use GET instead.',
+            'errors': {'method': 'METHOD_NOT_ALLOWED'}
+        }, status=405)
+
+    user_id = request.GET.get('user_id')
+    user_role = request.GET.get('user_role')
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('after') or 0
+    try:
+        user_id = int(user_id)
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'user_id and user_role are required',
+            'errors': {'fields': 'user_id must be an integer and user_role must be provided'}
+        }, status=400)
+    if not user_role:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'user_id and user_role are required',
+            'errors': {'fields': 'user_role is required'}
+        }, status=400)
+
+    def format_event(payload):
+        return f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+
+    @sync_to_async
+    def missed_messages(after_id):
+        messages = Message.objects.filter(
+            Q(receiver_id=user_id, receiver_role=user_role) | Q(sender_id=user_id, sender_role=user_role),
+            id__gt=after_id,
+        ).order_by('id')[:STREAM_REPLAY_LIMIT]
+        return [message_payload(message) for message in messages]
+
+    async def events():
+        broker = get_broker()
+        # Subscribe before replaying so nothing committed in between is lost
+        subscription = broker.subscribe(participant_channel(user_role, user_id))
+        sent_id = last_id
+        try:
+            yield "retry: 3000\n\n"
+            if last_id:
+                for payload in await missed_messages(last_id):
+                    sent_id = max(sent_id, payload['id'])
+                    yield format_event(payload)
+            while not subscription.lagged:
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload['id'] <= sent_id:
+                    continue
+                if payload.get('truncated'):
+                    # Too large for the event bus: read it, and anything before it, from the database
+                    for replayed in await missed_messages(sent_id):
+                        sent_id = max(sent_id, replayed['id'])
+                        yield format_event(replayed)
+                    continue
+                sent_id = payload['id']
+                yield format_event(payload)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+class UserInteractionViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = UserInteraction.objects.all()
     serializer_class = UserInteractionSerializer
     permission_classes = [AllowAny]
     pagination_class = CustomPagination
+    sync_kind = 'interaction'
+    sync_serializer_class = UserInteractionSerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        
-        # Filter by sender_id if provided
-        # Build filters dynamically based on query parameters
-        filters = {}
-        if sender_id := self.request.query_params.get('sender_id'):
-            filters['sender_id'] = sender_id
-        
-        if sender_role := self.request.query_params.get('sender_role'):
-            filters['sender_role'] = sender_role
-            
-        # Apply all filters at once if any exist
-        if filters:
-            queryset = queryset.filter(**filters)
+        params = self.request.query_params
+
+        # A participant may be stored on either side of the canonical row
+        if (sender_id := params.get('sender_id')) and (sender_role := params.get('sender_role')):
+            if (receiver_id := params.get('receiver_id')) and (receiver_role := params.get('receiver_role')):
+                # A single conversation: one unique-index lookup
+                try:
+                    key = conversation_key(sender_id, sender_role, receiver_id, receiver_role)
+                except ValueError:
+                    raise ValidationError({"detail": "sender_id and receiver_id must be integers"})
+                queryset = queryset.filter(conversation_key=key)
+            else:
+                queryset = queryset.filter(
+                    Q(sender_id=sender_id, sender_role=sender_role) |
+                    Q(receiver_id=sender_id, receiver_role=sender_role)
+                )
+        elif sender_id := params.get('sender_id'):
+            queryset = queryset.filter(Q(sender_id=sender_id) | Q(receiver_id=sender_id))
         # Order by most recent interaction
         return queryset.order_by('-last_interaction_time')
 
@@ -994,6 +1738,20 @@ class UserInteractionViewSet(viewsets.ModelViewSet):
             return UserInteractionListSerializer
         return self.serializer_class
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Lets the list serializer present the other participant as the receiver
+        params = self.request.query_params
+        if (sender_id := params.get('sender_id')) and (sender_role := params.get('sender_role')):
+            context['participant'] = (sender_id, sender_role)
+        return context
+
+    def list(self, request, *args, **kwargs):
+        # Delta sync mode: ?since=<token> returns only what changed
+        if 'since' in request.query_params:
+            return self.sync_list(request)
+        return super().list(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         # Extract sender and receiver data from request
         sender_id = request.data.get('sender_id')
@@ -1011,14 +1769,18 @@ class UserInteractionViewSet(viewsets.ModelViewSet):
         
         # Use select_for_update to prevent race conditions in high-traffic scenarios
         try:
-            # Use get_or_create with defaults to minimize queries
-            # This does a SELECT followed by either nothing or an INSERT in a single operation
-            interaction, created = UserInteraction.objects.select_related().get_or_create(
-                sender_id=sender_id,
-                sender_role=sender_role,
-                receiver_id=receiver_id,
-                receiver_role=receiver_role,
-                defaults=request.data
+            # One row per conversation, whichever participant records it
+            # This does a SELECT on the unique key followed by either nothing or an INSERT
+            interaction, created = UserInteraction.objects.get_or_create(
+                conversation_key=conversation_key(sender_id, sender_role, receiver_id, receiver_role),
+                defaults={
+                    'sender_id': sender_id,
+                    'sender_role': sender_role,
+                    'receiver_id': receiver_id,
+                    'receiver_role': receiver_role,
+                    'sender_name': request.data.get('sender_name', ''),
+                    'receiver_name': request.data.get('receiver_name', ''),
+                }
             )
             
             # If not created, we found an existing one - no need for further updates
@@ -0,0 +1,109 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionWriteBuffer:
+    """
+    Coalesces UserInteraction bumps in memory and writes them in batches.
+
+    Bumps for the same conversation are merged keeping the latest time, so a busy
+    chat costs one row update per flush instead of one per message. A background
+    thread flushes every ``flush_interval`` seconds; ``add`` flushes synchronously
+    when the oldest pending bump is older than ``max_staleness`` or when
+    ``max_pending`` conversations are waiting. Pending bumps are flushed at exit.
+    """
+
+    def __init__(self, flush_interval=1.0, max_staleness=5.0, max_pending=1000, enabled=True):
+        self.flush_interval = flush_interval
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._pending = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def _merge(self, interactions):
+        # Caller holds self._lock
+        for interaction in interactions:
+            current = self._pending.get(interaction.conversation_key)
+            if current is None or interaction.last_interaction_time >= current.last_interaction_time:
+                self._pending[interaction.conversation_key] = interaction
+        if self._pending and self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def add(self, interactions):
+        with self._lock:
+            self._merge(interactions)
+            overdue = (
+                len(self._pending) >= self.max_pending or
+                (self._oldest is not None and time.monotonic() - self._oldest >= self.max_staleness)
+            )
+        if not self.enabled or overdue:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Writes every pending bump; returns the number of conversations flushed"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._oldest = self._pending, {}, None
+            if not batch:
+                return 0
+            try:
+                apps.get_model("sewing_app", "UserInteraction").apply_bumps(list(batch.values()))
+            except Exception:
+                # Keep the bumps for the next attempt; merging keeps times monotonic
+                with self._lock:
+                    self._merge(batch.values())
+                raise
+            return len(batch)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="interaction-write-behind")
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(min(self.flush_interval, self.max_staleness))
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush user interaction updates")
+            finally:
+                # Each flush runs on this thread's own connection
+                connection.close()
+
+
+interaction_buffer = InteractionWriteBuffer(
+    flush_interval=getattr(settings, "INTERACTION_FLUSH_INTERVAL", 1.0),
+    max_staleness=getattr(settings, "INTERACTION_MAX_STALENESS", 5.0),
+    max_pending=getattr(settings, "INTERACTION_MAX_PENDING", 1000),
+    enabled=getattr(settings, "INTERACTION_WRITE_BEHIND", True),
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        interaction_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush user interaction updates at exit")